@@ -1,22 +1,43 @@
 from fastapi import FastAPI, BackgroundTasks, Response, status
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any, Union
-import time
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 import threading
-import requests
+import time
+import httpx
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from config import config
-from storage import DocumentStore
-from urllib.parse import urlparse
-from langchain_ollama import OllamaLLM
+from storage import DocumentStore, QueryCache, BatchSearcher, create_client, get_embeddings
+from langchain_ollama import ChatOllama
 
 
 # Global constants
 scrapers = {}
+scrapers_lock = asyncio.Lock()
+stores = {}
+# Guards store creation, which runs on worker threads
+stores_lock = threading.Lock()
+batchers = {}
+qdrant_client = None
+# Scrapes run on worker threads, each with its own event loop, so page
+# processing and embedding do not compete with the request handlers
+scrape_executor = None
 llm = None
 logger = config.get_logger(__name__)
+QUERY_CACHE_TTL_SECONDS = 600
+SEMANTIC_CACHE_THRESHOLD = 0.97
+# Pooled client for the health checks against local services
+_probe_client = httpx.AsyncClient(
+    timeout=httpx.Timeout(2.0, connect=0.5),
+    limits=httpx.Limits(max_keepalive_connections=4)
+)
+query_cache = QueryCache(max_size=2000, ttl_seconds=QUERY_CACHE_TTL_SECONDS)
 
 
 # Pydantic models
@@ -46,10 +67,26 @@ scheduler = AsyncIOScheduler()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan event to start and stop the scheduler"""
+    global scrape_executor
     logger.info("Starting application...")
     try:
+        scrape_executor = ThreadPoolExecutor(
+            max_workers=config.scrape.workers,
+            thread_name_prefix="scraper"
+        )
         scheduler.start()
         logger.info("Scheduler started successfully")
+        scheduler.add_job(
+            _log_progress,
+            IntervalTrigger(seconds=30),
+            id="progress_monitor",
+            replace_existing=True
+        )
+        # Load the embedding model before the first search needs it
+        try:
+            await asyncio.to_thread(get_embeddings)
+        except Exception as e:
+            logger.warning(f"Could not preload the embedding model: {e}")
         yield
     except Exception as e:
         logger.error(f"Error during startup: {e}")
@@ -58,10 +95,52 @@ async def lifespan(app: FastAPI):
         logger.info("Shutting down application...")
         scheduler.shutdown()
         logger.info("Scheduler stopped")
+        # Running crawls end once they see the stop, otherwise the
+        # interpreter waits for them on the executor threads at exit
+        for scraper in list(scrapers.values()):
+            try:
+                scraper.stop()
+            except Exception as e:
+                logger.error(f"Error stopping scraper {scraper.get_scraper_id()}: {e}")
+        if scrape_executor is not None:
+            scrape_executor.shutdown(wait=False, cancel_futures=True)
+        for batcher in batchers.values():
+            await batcher.close()
+        if qdrant_client is not None:
+            qdrant_client.close()
+        await _probe_client.aclose()
 
 
 app = FastAPI(title="RAG Supported Scraper API", version="1.0.0",
-              lifespan=lifespan)
+              lifespan=lifespan, default_response_class=ORJSONResponse)
+
+
+def ttl_cache(ttl: float):
+    """
+        Cache the result of a coroutine function without arguments for a
+        short time. Used for health checks so that frequent probes do not
+        hit the dependencies on every call
+        Args:
+            ttl: Number of seconds a result stays valid
+        Returns:
+            Decorator caching the wrapped function's result
+    """
+    def decorator(func):
+        slot = {}
+        lock = asyncio.Lock()
+
+        @functools.wraps(func)
+        async def wrapper():
+            async with lock:
+                now = time.monotonic()
+                if "v" in slot and now - slot["t"] < ttl:
+                    return slot["v"]
+                value = await func()
+                slot["t"] = time.monotonic()
+                slot["v"] = value
+                return value
+        return wrapper
+    return decorator
 
 
 def check_domain(url: Optional[str]) -> Optional[str]:
@@ -72,13 +151,14 @@ def check_domain(url: Optional[str]) -> Optional[str]:
         Returns:
             str: The domain as is if present and None otherwise
     """
-    if url is None:
-        return url
-    if url.startswith("http"):
+    if url and url.startswith(("http://", "https://")):
         return url
-    logger.error(f"Invalid domain received {url}")
+    if url is not None:
+        logger.error(f"Invalid domain received {url}")
+    return None
 
 
+@functools.lru_cache(maxsize=1024)
 def extract_domain(domain: str) -> str:
     """
         Extract the domain name from the http url.
@@ -91,8 +171,26 @@ def extract_domain(domain: str) -> str:
     """
     if not domain:
         return None
-    parsed_uri = urlparse(domain)
-    return parsed_uri.hostname
+    # Like urlparse, only a "//" after the scheme starts a network location
+    start = domain.find("://")
+    if start >= 0 and not any(c in domain[:start] for c in "/?#"):
+        start += 3
+    elif domain.startswith("//"):
+        start = 2
+    else:
+        return None
+    end = len(domain)
+    for separator in "/?#":
+        index = domain.find(separator, start)
+        if index != -1 and index < end:
+            end = index
+    # Drop credentials and port from the network location
+    netloc = domain[start:end].rpartition("@")[2]
+    if netloc.startswith("["):
+        host = netloc[1:netloc.find("]")]
+    else:
+        host = netloc.partition(":")[0]
+    return host.lower() if host else None
 
 
 @app.post("/scrape/start", response_model=Union[ScrapeResponse, ErrorResponse])
@@ -123,34 +221,72 @@ async def start_scrape(request: ScrapeRequest, response: Response,
         )
 
     host = extract_domain(domain)
-    if hasattr(scrapers, host):
-        # Scraper already present
-        response.status_code = status.HTTP_400_BAD_REQUEST
-        return ErrorResponse(
-            error=f"Scraper for domain {host} already exists",
-            code=status.HTTP_400_BAD_REQUEST
-        )
-    scraper = WebsiteScraper(domain, collection_name=host,
-                             override_robots=True)
-    background_tasks.add_task(scraper.scrape_website)
-    # If schedule interval is provided, start the scraper with a schedule
-    if request.schedule_interval_hours:
-        interval = request.schedule_interval_hours
-        logger.info(f"Scheduling scraper for {host} every {interval} hours")
-        scheduler.add_job(
-            scraper.scrape_website,
-            IntervalTrigger(hours=interval),
-            id=f"scraper_{host}",
-            replace_existing=True
-        )
+    async with scrapers_lock:
+        if host in scrapers:
+            # Scraper already present
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorResponse(
+                error=f"Scraper for domain {host} already exists",
+                code=status.HTTP_400_BAD_REQUEST
+            )
+        # The document store connects to Qdrant, keep that off the event loop
+        scraper = await asyncio.to_thread(
+            WebsiteScraper, domain, collection_name=host, override_robots=True)
+        background_tasks.add_task(_run_scrape, scraper, host)
+        # If schedule interval is provided, start the scraper with a schedule
+        if request.schedule_interval_hours:
+            interval = request.schedule_interval_hours
+            job_id = f"scraper_{host}"
+            try:
+                # Job left behind without a scraper, drop it
+                scheduler.remove_job(job_id)
+                logger.warning(f"Removed orphaned scheduler job {job_id}")
+            except JobLookupError:
+                pass
+            logger.info(f"Scheduling scraper for {host} every {interval} hours")
+            scraper.job = scheduler.add_job(
+                _run_scrape,
+                IntervalTrigger(hours=interval),
+                args=[scraper, host],
+                id=job_id
+            )
 
-    scrapers[host] = scraper
+        scrapers[host] = scraper
     logger.info("Web scraping started")
     return ScrapeResponse(status="Scraping started successfully")
 
 
+async def _run_scrape(scraper, host: str):
+    """
+        Scrape the website and invalidate the cached search results
+        of the domain once the knowledge base has been refreshed
+        Args:
+            scraper: The website scraper to run
+            host: The domain being scraped
+    """
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(scrape_executor, _scrape_in_worker, scraper)
+    query_cache.invalidate(host)
+    # Clear through the store /search caches answers with, so that it
+    # knows to create the cache collection again on its next write
+    store = stores.get(host)
+    if store is None and not scraper.stop_triggered:
+        store = scraper.document_store
+    if store is not None:
+        await asyncio.to_thread(store.clear_cached_responses)
+
+
+def _scrape_in_worker(scraper):
+    """
+        Run a scrape to completion on a scrape worker thread
+        Args:
+            scraper: The website scraper to run
+    """
+    asyncio.run(scraper.scrape_website())
+
+
 @app.put("/scrape/stop", response_model=Union[ScrapeResponse, ErrorResponse])
-def stop_scrape(request: ScrapeRequest, response: Response):
+async def stop_scrape(request: ScrapeRequest, response: Response):
     domain = check_domain(request.url)
     if domain is None:
         # Bad Request. No search query provided
@@ -160,21 +296,25 @@ def stop_scrape(request: ScrapeRequest, response: Response):
             code=status.HTTP_400_BAD_REQUEST
         )
     domain = extract_domain(domain)
-    scraper = scrapers.get(domain, None)
-    if scraper is None:
-        # Bad Request. No scraper present for the domain
-        response.status_code = status.HTTP_400_BAD_REQUEST
-        return ErrorResponse(
-            error="No scraper present with this domain",
-            code=status.HTTP_400_BAD_REQUEST
-        )
-    scraper.stop()
-    # Remove the scraper from the dictionary
-    del scrapers[domain]
-    # Remove the job from the scheduler if it exists
-    job_id = f"scraper_{domain}"
-    if scheduler.get_job(job_id):
-        scheduler.remove_job(job_id)
+    async with scrapers_lock:
+        scraper = scrapers.get(domain, None)
+        if scraper is None:
+            # Bad Request. No scraper present for the domain
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorResponse(
+                error="No scraper present with this domain",
+                code=status.HTTP_400_BAD_REQUEST
+            )
+        scraper.stop()
+        # Remove the scraper from the dictionary
+        del scrapers[domain]
+        # Remove the job from the scheduler if it exists
+        if scraper.job is not None:
+            try:
+                scraper.job.remove()
+            except JobLookupError:
+                pass
+            scraper.job = None
     logger.info(f"Scraper for {domain} stopped successfully")
     # Return a success response
     response.status_code = status.HTTP_200_OK
@@ -184,20 +324,23 @@ def stop_scrape(request: ScrapeRequest, response: Response):
 
 
 @app.get("/statusz", response_model=Union[ScrapeResponse, ErrorResponse])
-def statusz(response: Response):
+async def statusz(response: Response):
     running = True
     errors = []
+    llm_disabled = config.is_llm_disabled()
+    # Probe the vector database and Ollama concurrently
+    datastore_ok, (ollama_ok, _) = await asyncio.gather(
+        _check_datastore(),
+        _llm_skipped() if llm_disabled else check_ollama_status()
+    )
     # Check if Vector database is up and running ?
-    statusz = _check_datastore()
-    if statusz is False:
+    if datastore_ok is False:
         errors.append("Local Vector DB is offline")
         running = False
     # Check if Ollama is running
-    if not config.is_llm_disabled():
-        statusz, _ = check_ollama_status()
-        if statusz is False:
-            errors.append("Local LLM is offline")
-            running = False
+    if ollama_ok is False:
+        errors.append("Local LLM is offline")
+        running = False
     if not running:
         response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
         return ErrorResponse(
@@ -212,8 +355,15 @@ def statusz(response: Response):
     )
 
 
+async def _llm_skipped():
+    """
+        Placeholder probe result used when the LLM is disabled
+    """
+    return True, "LLM disabled"
+
+
 @app.get("/scrape/status", response_model=Dict[str, Any])
-def scrape_status(response: Response):
+async def scrape_status(response: Response):
     """
         Get the status of all active scrapers.
         Returns:
@@ -232,7 +382,7 @@ def scrape_status(response: Response):
 
 
 @app.post("/search", response_model=Union[ErrorResponse, Dict[str, Any]])
-def search(request: SearchRequest, response: Response):
+async def search(request: SearchRequest, response: Response):
     domain = request.domain
 
     if domain is None:
@@ -255,8 +405,29 @@ def search(request: SearchRequest, response: Response):
                 with query: {query}")
 
     domain = extract_domain(domain)
-    client = DocumentStore(domain)
-    docs = client.search_documents(query)
+    # Exact match on the domain and query
+    cached = query_cache.get(domain, query)
+    if cached is not None:
+        logger.debug(f"Query cache hit for domain {domain}")
+        if "response" in cached:
+            # LLM answers are served as plain text, same as when streamed
+            return PlainTextResponse(cached["response"])
+        response.status_code = status.HTTP_200_OK
+        return cached
+
+    batcher = await get_batcher(domain)
+    client = batcher.store
+    generation = query_cache.generation(domain)
+    # Concurrent queries on the domain share one embedding and Qdrant call
+    try:
+        embedding, docs = await batcher.submit(query)
+    except Exception as e:
+        logger.error(f"Error searching documents: {str(e)}")
+        response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        return ErrorResponse(
+            error="Failed to search the knowledge base",
+            code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
 
     if config.is_llm_disabled():
         # If LLM is disabled, return the raw search results
@@ -267,47 +438,170 @@ def search(request: SearchRequest, response: Response):
                 code=status.HTTP_404_NOT_FOUND
             )
         # Return the results as a JSON response
-        response.status_code = status.HTTP_200_OK
-        return {
+        result = {
             "results": docs
         }
+        await _cache_search_result(client, domain, query, generation, result)
+        response.status_code = status.HTTP_200_OK
+        return result
+
+    # Semantically similar query answered before, skip the LLM call
+    cached = await asyncio.to_thread(
+        client.find_cached_response, embedding, generation,
+        SEMANTIC_CACHE_THRESHOLD, QUERY_CACHE_TTL_SECONDS)
+    if cached is not None:
+        logger.debug(f"Semantic cache hit for domain {domain}")
+        cached = {**cached, "query": query}
+        query_cache.put(domain, query, cached)
+        return PlainTextResponse(cached["response"])
+
+    if not llm:
+        response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        return ErrorResponse(
+            error="Failed to get response from LLM",
+            code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
 
     # Extract and format the results
     results = "\n".join([doc.get("text", "") for doc in docs])
 
     augmented_query = f"Context: {results}\n\nQuestion: {query}\nAnswer:"
-    resp = query_ollama(augmented_query)
-    if not resp:
+
+    # Wait for the first token before committing to a 200 response,
+    # so an unreachable LLM or an empty answer still results in an error
+    tokens = stream_ollama(augmented_query)
+    try:
+        first = await anext(tokens, "")
+    except Exception as e:
+        logger.error(f"Error getting response from LLM: {str(e)}")
+        first = ""
+    if not first:
         response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
         return ErrorResponse(
             error="Failed to get response from LLM",
             code=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
-    # Return the response from the LLM
-    response.status_code = status.HTTP_200_OK
-    return {
-        "query": query,
-        "response": resp
-    }
+
+    async def generate():
+        parts = [first]
+        yield first
+        try:
+            async for token in tokens:
+                parts.append(token)
+                yield token
+        except Exception as e:
+            # Headers are sent already, end the truncated answer
+            logger.error(f"Error streaming response from LLM: {str(e)}")
+            return
+        # Cache the complete answer once the stream is done
+        result = {
+            "query": query,
+            "response": "".join(parts)
+        }
+        if result["response"]:
+            await _cache_search_result(client, domain, query, generation,
+                                       result, embedding=embedding)
+
+    # Stream the response from the LLM as it is generated
+    return StreamingResponse(generate(), media_type="text/plain")
+
+
+def _create_store(domain: str) -> DocumentStore:
+    """
+        Create the document store of a domain unless another thread
+        created it first. Connecting to Qdrant and checking the
+        collection are blocking calls, run this on a worker thread
+        Args:
+            domain: The domain to search
+        Returns:
+            DocumentStore: Document store of the domain
+    """
+    global qdrant_client
+    with stores_lock:
+        store = stores.get(domain)
+        if store is None:
+            if qdrant_client is None:
+                qdrant_client = create_client()
+            store = DocumentStore(domain, client=qdrant_client)
+            stores[domain] = store
+        return store
+
+
+async def get_store(domain: str) -> DocumentStore:
+    """
+        Get the document store of a domain, creating it on first use.
+        All stores share one Qdrant client and embedding model
+        Args:
+            domain: The domain to search
+        Returns:
+            DocumentStore: Document store of the domain
+    """
+    store = stores.get(domain)
+    if store is None:
+        store = await asyncio.to_thread(_create_store, domain)
+    return store
+
+
+async def get_batcher(domain: str) -> BatchSearcher:
+    """
+        Get the batch searcher of a domain, creating it on first use
+        Args:
+            domain: The domain to search
+        Returns:
+            BatchSearcher: Batch searcher bound to the domain's store
+    """
+    batcher = batchers.get(domain)
+    if batcher is None:
+        store = await get_store(domain)
+        # Another request may have created it while the store was opened
+        batcher = batchers.setdefault(
+            domain, BatchSearcher(store, top_k=config.vector_db.top_k))
+    return batcher
+
+
+async def _cache_search_result(client: DocumentStore, domain: str, query: str,
+                               generation: int, result: Dict[str, Any],
+                               embedding=None):
+    """
+        Store a search result in the exact query cache and, when the
+        query embedding is given, in the semantic query cache
+        Args:
+            client: Document store of the domain
+            domain: The domain searched
+            query: The search query
+            generation: Cache generation the result was computed for
+            result: The search result
+            embedding: Embedding of the search query
+    """
+    if generation != query_cache.generation(domain):
+        # Content was re-scraped while the query was running
+        return
+    query_cache.put(domain, query, result)
+    if embedding is not None:
+        await asyncio.to_thread(client.cache_response, embedding, result,
+                                generation)
 
 
 # Function to interact with the Ollama LLM
-def query_ollama(prompt):
+async def stream_ollama(prompt):
     """
-    Send a query to Ollama and retrieve the response.
+    Send a query to Ollama and stream the response.
 
     Args:
         prompt (str): The input prompt for Ollama.
 
-    Returns:
-        str: The response from Ollama.
+    Yields:
+        str: The response from Ollama, chunk by chunk.
     """
     if not llm:
         raise ValueError("LLM is not initialized / disabled. Please check your configuration.")
-    return llm.invoke(prompt)
+    async for chunk in llm.astream(prompt):
+        if chunk.content:
+            yield chunk.content
 
 
-def check_ollama_status():
+@ttl_cache(ttl=2.0)
+async def check_ollama_status():
     """
         Check if Ollama is running
 
@@ -317,39 +611,37 @@ def check_ollama_status():
     """
     try:
         # Check if the API is responding
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
+        response = await _probe_client.get("http://localhost:11434/api/tags")
         if response.status_code == 200:
             data = response.json()
             return True, data
         else:
             return False, f"HTTP {response.status_code}"
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         return False, "Connection refused - Ollama not running"
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         return False, "Request timeout"
     except Exception as e:
         return False, f"Error: {e}"
 
 
-def _check_datastore():
+@ttl_cache(ttl=2.0)
+async def _check_datastore():
     """
         Check if the local vector database (Qdrant) is running
     Returns:
         bool: True if running and false otherwise
     """
     try:
-        vector_db_config = config.get_config().get(config.VECTOR_DB_CONFIGURATION)
-        if not vector_db_config:
-            return False
         # Check if the Qdrant server is running
-        host = vector_db_config.get("host")
-        port = vector_db_config.get("port")
+        host = config.vector_db.host
+        port = config.vector_db.port
         if not host or not port:
             logger.error("Vector DB host or port not configured")
             return False
         # Make a simple request to the health endpoint of Qdrant
         url = f"http://{host}:{port}/healthz"
-        response = requests.get(url, timeout=5)
+        response = await _probe_client.get(url)
         if response.status_code == 200:
             return True
         return False
@@ -357,19 +649,13 @@ def _check_datastore():
         return False
 
 
-def _monitor_scraper_progress():
+async def _log_progress():
     """
-        Monitor the progress of the web scrapers and log their status
+        Log the progress of the web scrapers. Runs as a scheduler job
+        on the event loop, next to the request handlers
     """
-    while True:
-        for domain, scraper in scrapers.items():
-            logger.info(f"Progress for scraper {domain}: {scraper.progress()}")
-
-        # Sleep for a while before checking again
-        try:
-            time.sleep(30)  # Check every 60 seconds
-        except (KeyboardInterrupt, SystemExit):
-            logger.info("Stopping scraper progress monitoring")
+    for domain, scraper in scrapers.items():
+        logger.info(f"Progress for scraper {domain}: {scraper.progress()}")
 
 
 # This is the main entry point for the RAG Search application
@@ -377,15 +663,10 @@ if __name__ == '__main__':
     # Load config
     config.initialize()
 
-    # Start a progess monitoring thread
-    progress_thread = threading.Thread(target=_monitor_scraper_progress)
-    progress_thread.daemon = True
-    progress_thread.start()
-
     # Initialize the LLM
     if not config.is_llm_disabled():
-        llm = OllamaLLM(
-            model=config.get_config().get("llm_model", "gemma3:12b"))
+        llm = ChatOllama(
+            model=config.llm.model_name)
 
     import uvicorn
     uvicorn.run(app,
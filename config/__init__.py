@@ -4,7 +4,10 @@ from .config import (
     get_config,
     update_config,
     get_scraper_useragent,
-    is_llm_disabled
+    is_llm_disabled,
+    ScrapeConfig,
+    VectorDBConfig,
+    LLMConfig
 )
 
 __all__ = [
@@ -13,5 +16,8 @@ __all__ = [
     "get_config",
     "update_config",
     "get_scraper_useragent",
-    "is_llm_disabled"
+    "is_llm_disabled",
+    "ScrapeConfig",
+    "VectorDBConfig",
+    "LLMConfig"
 ]
@@ -1,6 +1,8 @@
 import os
 import json
 import logging
+from dataclasses import asdict, dataclass, fields
+from types import MappingProxyType
 from dotenv import load_dotenv
 
 __default__config = dict(
@@ -10,35 +12,71 @@ __default__config = dict(
     llm_model="gemma3:12b"
 )
 
-__default_scrape_config = {
-    # Default scraping configuration
-    "user_agent": "Mozilla/5.0 (compatible; RAGSearchBot/1.0;)",
-    "scrape_interval": 24 * 60 * 60,  # Default scrape interval in seconds (24 hours)
-    "max_depth": 3,  # Default maximum depth for crawling
-    "max_pages": 200,  # Default maximum number of pages to scrape
-    "concurrency": 25,  # Default number of concurrent requests
-}
-
-__default_vector_db_config = {
-    # Default vector database configuration
-    "host": "localhost",
-    "port": 6333,  # Default port for Qdrant
-    "collection_name": "default_collection",  # Default collection name
-    "vector_size": 384,  # Size for all-MiniLM-L6-v2 embeddings
-    "distance_metric": "cosine"  # Distance metric for vector similarity
-}
-
-__default_llm_config = {
-    # Default LLM configuration
-    "model_name": "gemma3:12b",  # Default model name
-    "disable": False
-}
+
+@dataclass(frozen=True, slots=True)
+class ScrapeConfig:
+    """Scraping configuration"""
+    user_agent: str = "Mozilla/5.0 (compatible; RAGSearchBot/1.0;)"
+    scrape_interval: int = 24 * 60 * 60  # Default scrape interval in seconds (24 hours)
+    max_depth: int = 3  # Default maximum depth for crawling
+    max_pages: int = 200  # Default maximum number of pages to scrape
+    concurrency: int = 25  # Default number of concurrent requests
+    crawl_delay: float = 2.0  # Default crawl delay in seconds
+    workers: int = 4  # Number of websites scraped in parallel
+    page_max_uses: int = 50  # URLs loaded in a browser page before it is replaced
+    context_max_pages: int = 200  # URLs loaded in a browser context before it is replaced
+    navigation_timeout_ms: int = 15000  # Maximum time to load the DOM of a page
+    network_idle_timeout_ms: int = 3000  # Maximum extra time to wait for the network to go idle
+    block_resources: bool = True  # Skip images, media, fonts and stylesheets
+    store_batch_size: int = 8  # Number of scraped pages embedded and stored together
+
+
+@dataclass(frozen=True, slots=True)
+class VectorDBConfig:
+    """Vector database configuration"""
+    engine: str = "qdrant"
+    host: str = "localhost"
+    port: int = 6333  # Default port for Qdrant
+    grpc_port: int = 6334  # Default gRPC port for Qdrant
+    prefer_grpc: bool = True  # Use gRPC instead of REST for Qdrant calls
+    hnsw_ef: int = 128  # Size of the HNSW candidate list when searching
+    quantization: bool = True  # Keep an int8 copy of the vectors for searching
+    oversampling: float = 2.0  # Candidates fetched per result before rescoring
+    collection_name: str = "default_collection"  # Default collection name
+    vector_size: int = 384  # Size for all-MiniLM-L6-v2 embeddings
+    distance_metric: str = "cosine"  # Distance metric for vector similarity
+    top_k: int = 5  # Number of documents returned by a search
+    embedding_batch_size: int = 64  # Number of texts embedded per model call
+    embedding_device: str = ""  # Device of the embedding model, detected when empty
+    embedding_fp16: bool = True  # Run the embedding model in half precision on GPUs
+    upsert_batch_size: int = 256  # Maximum number of points per upsert request
+
+
+@dataclass(frozen=True, slots=True)
+class LLMConfig:
+    """LLM configuration"""
+    model_name: str = "gemma3:12b"  # Default model name
+    disable: bool = False
+
+
+__default_scrape_config = asdict(ScrapeConfig())
+__default_vector_db_config = asdict(VectorDBConfig())
+__default_llm_config = asdict(LLMConfig())
+
+# Typed views of the sub-configurations, rebuilt whenever they change.
+# Prefer these over get_config() lookups on hot paths
+scrape = ScrapeConfig()
+vector_db = VectorDBConfig()
+llm = LLMConfig()
 
 
 SCRAPE_CONFIGURATION = "SCRAPE_CONFIGURATION"
 VECTOR_DB_CONFIGURATION = "VECTOR_DB_CONFIGURATION"
 LLM_CONFIGURATION = "LLM_CONFIGURATION"
 
+# Read-only view of the configuration handed out to callers
+__config_view = MappingProxyType(__default__config)
+
 
 def initialize():
     """
@@ -60,17 +98,93 @@ def initialize():
     )
 
     # Setup crawling configuration
-    __default__config[SCRAPE_CONFIGURATION] = json.loads(os.getenv(SCRAPE_CONFIGURATION, __default_scrape_config))
+    __default__config[SCRAPE_CONFIGURATION] = _load_json_env(SCRAPE_CONFIGURATION, __default_scrape_config)
 
     # Setup vector database configuration
-    __default__config[VECTOR_DB_CONFIGURATION] = json.loads(os.getenv(VECTOR_DB_CONFIGURATION, __default_vector_db_config))
+    __default__config[VECTOR_DB_CONFIGURATION] = _load_json_env(VECTOR_DB_CONFIGURATION, __default_vector_db_config)
 
     # Setup LLM configuration
-    __default__config[LLM_CONFIGURATION] = json.loads(os.getenv(LLM_CONFIGURATION, __default_llm_config))
+    __default__config[LLM_CONFIGURATION] = _load_json_env(LLM_CONFIGURATION, __default_llm_config)
+    _refresh_typed_config()
 
     logging.info(f"Configuration {__default__config} initialized successfully.")
 
 
+def _load_json_env(name: str, defaults: dict) -> dict:
+    """
+    Load a JSON configuration from an environment variable
+    Args:
+        name (str): Name of the environment variable
+        defaults (dict): Default settings, overridden by the variable
+    Returns:
+        dict: The merged configuration
+    """
+    raw = os.getenv(name)
+    if not raw:
+        return dict(defaults)
+    return {**defaults, **json.loads(raw)}
+
+
+def _from_dict(cls, data: dict):
+    """
+    Build a configuration dataclass from a dictionary.
+    Unknown keys are ignored and values are converted to the annotated
+    type of the field, e.g. "5" becomes 5 for an int field
+    Args:
+        cls: The configuration dataclass
+        data (dict): The configuration settings
+    Returns:
+        An instance of cls
+    """
+    values = {}
+    for field in fields(cls):
+        if not data or field.name not in data:
+            continue
+        value = data[field.name]
+        field_type = field.type
+        if field_type is bool:
+            value = _to_bool(field.name, value)
+        elif value is not None and not isinstance(value, field_type):
+            value = field_type(value)
+        values[field.name] = value
+    return cls(**values)
+
+
+def _to_bool(name: str, value) -> bool:
+    """
+    Convert a configuration value to a bool
+    Args:
+        name (str): Name of the setting, used in the error message
+        value: The value, a bool, 0 or 1, or one of the strings
+            "true", "false", "1", "0", "yes" and "no"
+    Returns:
+        bool: The converted value
+    Raises:
+        ValueError: If the value is not a recognised boolean
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        normalized = value.strip().lower()
+        if normalized in ("true", "1", "yes"):
+            return True
+        if normalized in ("false", "0", "no"):
+            return False
+    raise ValueError(f"Invalid boolean value for {name}: {value!r}")
+
+
+def _refresh_typed_config():
+    """
+    Rebuild the typed sub-configurations from the configuration dictionary
+    """
+    global scrape, vector_db, llm
+    scrape = _from_dict(ScrapeConfig, __default__config.get(SCRAPE_CONFIGURATION))
+    vector_db = _from_dict(VectorDBConfig, __default__config.get(VECTOR_DB_CONFIGURATION))
+    llm = _from_dict(LLMConfig, __default__config.get(LLM_CONFIGURATION))
+
+
 def get_log_level():
     """
     Get the logging level from environment variable or default to INFO
@@ -79,11 +193,11 @@ def get_log_level():
     """
     log_level = os.getenv("LOGGING_LEVEL", "INFO").upper()
     if log_level == "DEBUG":
-        return logging.DEBUG,
+        return logging.DEBUG
     elif log_level == "WARNING":
-        return logging.WARNING,
+        return logging.WARNING
     elif log_level == "ERROR":
-        return logging.ERROR,
+        return logging.ERROR
     return logging.INFO
 
 
@@ -101,13 +215,14 @@ def get_logger(name: str) -> logging.Logger:
     return logging.getLogger(name)
 
 
-def get_config() -> dict:
+def get_config() -> MappingProxyType:
     """
     Get the default configuration settings
     Returns:
-        dict: A copy of the default configuration dictionary
+        MappingProxyType: A read-only view of the configuration dictionary.
+            Use update_config to change settings
     """
-    return __default__config.copy()
+    return __config_view
 
 
 def update_config(new_config: dict):
@@ -117,6 +232,7 @@ def update_config(new_config: dict):
         new_config (dict): Dictionary containing new configuration settings
     """
     __default__config.update(new_config)
+    _refresh_typed_config()
     logging.info(f"Configuration updated: {__default__config}")
 
 
@@ -126,13 +242,7 @@ def get_scraper_useragent() -> str:
     Returns:
         str: User agent string
     """
-    print(f"config is {get_config()}")
-    scraper_config = get_config()[SCRAPE_CONFIGURATION] if hasattr(get_config(), SCRAPE_CONFIGURATION) else {}
-    if "user_agent" in scraper_config:
-        return scraper_config["user_agent"]
-
-    # Fallback to environment variable or default user agent
-    return "Mozilla/5.0 (compatible; RAGChatBot/1.0;)"
+    return scrape.user_agent
 
 
 def is_llm_disabled() -> bool:
@@ -141,5 +251,4 @@ def is_llm_disabled() -> bool:
     Returns:
         bool: True if LLM is disabled, False otherwise
     """
-    llm_config = get_config()[LLM_CONFIGURATION]
-    return llm_config.get("disable", False)
+    return llm.disable
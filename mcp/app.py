@@ -10,10 +10,11 @@ to perform search operations, start and stop scraping tasks, and test the
 connection to the service.
 """
 import os
-import json
 import httpx
+import orjson
 import logging
 
+from contextlib import asynccontextmanager
 from pydantic import BaseModel, Field
 from typing import Any, Dict, Optional
 from urllib.parse import urlparse
@@ -23,9 +24,6 @@ from fastmcp import FastMCP
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize FastMCP server
-mcp = FastMCP("MCP Server for RAG Search", version="1.0.0")
-
 # Configuration for allowed hosts (security measure)
 ALLOWED_HOSTS = [
 
@@ -37,6 +35,55 @@ DEFAULT_REMOTE_RAG_SERVICE = "http://localhost:8090"
 # Get the remote RAG service URL from environment variable or use default
 SERVICE_URL = os.getenv("RAG_SERVICE_URL", DEFAULT_REMOTE_RAG_SERVICE)
 
+# Shared HTTP client so that connections to the RAG service are kept alive
+# across tool invocations
+_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+async def get_client() -> httpx.AsyncClient:
+    """
+        Get the shared HTTP client for the remote RAG service,
+        creating it on first use.
+        Returns:
+            httpx.AsyncClient: Client bound to SERVICE_URL
+    """
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(
+            base_url=SERVICE_URL,
+            timeout=DEFAULT_TIMEOUT_SECONDS,
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=20,
+                max_connections=50
+            )
+        )
+    return _CLIENT
+
+
+async def close_client():
+    """
+        Close the shared HTTP client if it was created.
+    """
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Lifespan hook to release the shared HTTP client on shutdown"""
+    try:
+        yield
+    finally:
+        await close_client()
+
+
+# Initialize FastMCP server
+mcp = FastMCP("MCP Server for RAG Search", version="1.0.0",
+              lifespan=lifespan)
+
 # Pydantic Models
 class SearchRequest(BaseModel):
     """
@@ -110,22 +157,108 @@ def is_url_allowed(url: str) -> bool:
         return False
 
 
-def format_response(response: httpx.Response) -> Dict[str, Any]:
-    """Format HTTP response for MCP tool result."""
-    try:
-        # Try to parse JSON response
-        json_data = response.json()
-    except Exception:
+def to_json(data: Any, indent: bool = False) -> str:
+    """
+        Serialize tool results to a JSON string.
+        Args:
+            data: The data to serialize
+            indent: Pretty print with two space indentation
+        Returns:
+            str: The JSON document
+    """
+    option = orjson.OPT_INDENT_2 if indent else 0
+    return orjson.dumps(data, option=option).decode()
+
+
+def format_response(response: httpx.Response, answer: Optional[str] = None) -> Dict[str, Any]:
+    """
+        Format HTTP response for MCP tool result.
+        Args:
+            response: The HTTP response
+            answer: Complete text of a streamed LLM answer, returned
+                    without truncation
+        Returns:
+            Dict[str, Any]: Summary of the response
+    """
+    if answer is not None:
         json_data = None
+        text = answer
+    else:
+        try:
+            # Try to parse JSON response
+            json_data = orjson.loads(response.content)
+        except Exception:
+            json_data = None
+        text = response.text[:2000] if len(response.text) > 2000 else response.text
 
     return {
         "status_code": response.status_code,
         "json": json_data,
-        "text": response.text[:2000] if len(response.text) > 2000 else response.text,
+        "text": text,
         "elapsed_ms": response.elapsed.total_seconds() * 1000 if response.elapsed else None,
         "success": 200 <= response.status_code < 300
     }
 
+
+def _not_allowed() -> str:
+    """
+        Build the error returned for URLs outside ALLOWED_HOSTS.
+        Returns:
+            str: JSON error document
+    """
+    return to_json({
+        "error": f"URL not allowed. Host must be in: {', '.join(ALLOWED_HOSTS)}"
+    })
+
+
+async def _call(
+    method: str,
+    path: str,
+    json_body: Optional[Dict[str, Any]] = None,
+    url: Optional[str] = None,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS
+) -> str:
+    """
+        Call the remote RAG service and format the result for MCP.
+        Streamed text answers are collected in full before returning.
+        Args:
+            method: HTTP method of the request
+            path: Path of the endpoint, relative to SERVICE_URL
+            json_body: Optional JSON payload of the request
+            url: URL checked against ALLOWED_HOSTS,
+                 defaults to the endpoint URL
+            timeout: Request timeout in seconds (default: 30)
+        Returns:
+            str: JSON string containing the response data
+    """
+    if not is_url_allowed(url if url is not None else f"{SERVICE_URL}{path}"):
+        return _not_allowed()
+
+    try:
+        client = await get_client()
+        async with client.stream(
+            method,
+            path,
+            json=json_body,
+            timeout=timeout
+        ) as response:
+            answer = None
+            if response.headers.get("content-type", "").startswith("text/plain"):
+                # LLM answers are streamed, collect the chunks as they arrive
+                answer = "".join([chunk async for chunk in response.aiter_text()])
+            else:
+                await response.aread()
+
+        result = format_response(response, answer=answer)
+        return to_json(result, indent=True)
+
+    except httpx.TimeoutException:
+        return to_json({"error": "Request timed out"})
+    except Exception as e:
+        logger.error(f"{method} {path} request error: {str(e)}")
+        return to_json({"error": str(e)})
+
+
 # MCP Tools
 @mcp.tool()
 async def search(
@@ -134,44 +267,19 @@ async def search(
     timeout: float = DEFAULT_TIMEOUT_SECONDS
 ) -> str:
     """
-    Make a GET request to a remote HTTP service.
+    Search the scraped content of a website.
 
     Args:
-        domain: The URL to make the GET request to
+        domain: The website to search within
         query: The search query to include in the request
         timeout: Request timeout in seconds (default: 30)
 
     Returns:
         JSON string containing the response data
     """
-    if not is_url_allowed(domain):
-        return json.dumps({
-            "error": f"URL not allowed. Host must be in: {', '.join(ALLOWED_HOSTS)}"
-        })
-
-    # Prepare parameters for the GET request
-    payload = SearchRequest(
-        domain=domain,
-        query=query
-    )
-
-    url = f"{SERVICE_URL}/search"
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                json=payload.model_dump(),
-                timeout=timeout
-            )
-
-            result = format_response(response)
-            return json.dumps(result, indent=2)
-
-    except httpx.TimeoutException:
-        return json.dumps({"error": "Request timed out"})
-    except Exception as e:
-        logger.error(f"GET request error: {str(e)}")
-        return json.dumps({"error": str(e)})
+    payload = SearchRequest(domain=domain, query=query)
+    return await _call("POST", "/search", json_body=payload.model_dump(),
+                       url=domain, timeout=timeout)
 
 
 @mcp.tool()
@@ -191,32 +299,9 @@ async def start_scrape(
     Returns:
         JSON string containing the response data
     """
-    if not is_url_allowed(url):
-        return json.dumps({
-            "error": f"URL not allowed. Host must be in: {', '.join(ALLOWED_HOSTS)}"
-        })
-
-    headers = {}
-    path = f"{SERVICE_URL}/scrape/start"
     payload = ScrapeRequest(url=url, schedule_interval_hours=schedule_interval_hours)
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                path,
-                headers=headers,
-                json=payload.model_dump(),
-                timeout=timeout
-            )
-
-            result = format_response(response)
-            return json.dumps(result, indent=2)
-
-    except httpx.TimeoutException:
-        return json.dumps({"error": "Request timed out"})
-    except Exception as e:
-        logger.error(f"POST request error: {str(e)}")
-        return json.dumps({"error": str(e)})
+    return await _call("POST", "/scrape/start", json_body=payload.model_dump(),
+                       url=url, timeout=timeout)
 
 
 @mcp.tool()
@@ -234,31 +319,9 @@ async def stop_scrape(
     Returns:
         JSON string containing the response data
     """
-    if not is_url_allowed(url):
-        return json.dumps({
-            "error": f"URL not allowed. Host must be in: {', '.join(ALLOWED_HOSTS)}"
-        })
-
-    headers = {}
-    path = f"{SERVICE_URL}/scrape/stop"
     payload = ScrapeRequest(url=url)
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.put(
-                path,
-                headers=headers,
-                json=payload.model_dump(),
-                timeout=timeout
-            )
-
-            result = format_response(response)
-            return json.dumps(result, indent=2)
-
-    except httpx.TimeoutException:
-        return json.dumps({"error": "Request timed out"})
-    except Exception as e:
-        logger.error(f"POST request error: {str(e)}")
-        return json.dumps({"error": str(e)})
+    return await _call("PUT", "/scrape/stop", json_body=payload.model_dump(),
+                       url=url, timeout=timeout)
 
 
 @mcp.tool()
@@ -272,23 +335,7 @@ async def get_scrape_status() -> str:
     Returns:
         JSON string containing the scrape status
     """
-    url = f"{SERVICE_URL}/scrape/status"
-    if not is_url_allowed(url):
-        return json.dumps({
-            "error": f"URL not allowed. Host must be in: {', '.join(ALLOWED_HOSTS)}"
-        })
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=DEFAULT_TIMEOUT_SECONDS)
-
-            result = format_response(response)
-            return json.dumps(result, indent=2)
-
-    except Exception as e:
-        return json.dumps({
-            "error": str(e)
-        })
+    return await _call("GET", "/scrape/status")
 
 
 @mcp.tool()
@@ -300,26 +347,23 @@ async def test_connection() -> str:
     Returns:
         JSON string containing the test results
     """
-    url = f"{SERVICE_URL}/statusz"
-    if not is_url_allowed(url):
-        return json.dumps({
-            "error": f"URL not allowed. Host must be in: {', '.join(ALLOWED_HOSTS)}"
-        })
+    if not is_url_allowed(f"{SERVICE_URL}/statusz"):
+        return _not_allowed()
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=DEFAULT_TIMEOUT_SECONDS)
+        client = await get_client()
+        response = await client.get("/statusz")
 
-            result = {
-                "test_passed": 200 <= response.status_code < 300,
-                "status_code": response.status_code,
-                "response_time_ms": response.elapsed.total_seconds() * 1000 if response.elapsed else None,
-                "url": str(response.url)
-            }
-            return json.dumps(result, indent=2)
+        result = {
+            "test_passed": 200 <= response.status_code < 300,
+            "status_code": response.status_code,
+            "response_time_ms": response.elapsed.total_seconds() * 1000 if response.elapsed else None,
+            "url": str(response.url)
+        }
+        return to_json(result, indent=True)
 
     except Exception as e:
-        return json.dumps({
+        return to_json({
             "test_passed": False,
             "error": str(e)
         })
@@ -1,5 +1,7 @@
 from .website_scraper import WebsiteScraper
+from .page_pool import PagePool
 
 __all__ = [
-    "WebsiteScraper"
+    "WebsiteScraper",
+    "PagePool"
 ]
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+
+class PagePool:
+    """
+        Bounded pool of reusable Playwright pages of one browser context.
+        Pages are reset to about:blank between URLs and replaced after
+        a number of uses to bound the memory held by long lived pages.
+        When a context factory is given, the whole context is replaced
+        every rotate_every pages, carrying over its cookies and storage.
+    """
+
+    def __init__(self, context, size: int, max_uses: int = 50,
+                 context_factory: Optional[Callable[[Optional[Dict]], Awaitable[object]]] = None,
+                 rotate_every: int = 0):
+        self.context = context
+        self.size = size
+        self.max_uses = max_uses
+        self.context_factory = context_factory
+        self.rotate_every = rotate_every
+        self.logger = logging.getLogger(__name__)
+        self._pages: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self._uses: Dict[object, int] = {}
+        self._live = 0
+        # Pages checked out or waited for, and pages served by the context
+        self._in_use = 0
+        self._served = 0
+        # Cleared while the context is drained and replaced
+        self._ready = asyncio.Event()
+        self._ready.set()
+
+    async def start(self):
+        """
+            Open all pages of the pool up front
+        """
+        while self._live < self.size:
+            self._live += 1
+            try:
+                self._pages.put_nowait(await self._new_page())
+            except Exception:
+                self._live -= 1
+                raise
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[object]:
+        """
+            Check out a page, returning it to the pool afterwards
+            Yields:
+                Page: Playwright page for the exclusive use of the caller
+        """
+        await self._ready.wait()
+        self._in_use += 1
+        try:
+            page = await self._acquire()
+            try:
+                yield page
+            finally:
+                await self._release(page)
+        finally:
+            self._in_use -= 1
+            self._served += 1
+            # Also runs when the caller failed, otherwise the last page
+            # leaving during a pending rotation would never rotate
+            if self._rotation_due():
+                # Hold back new checkouts until the in-flight pages are done
+                self._ready.clear()
+                if self._in_use == 0:
+                    await self._rotate()
+
+    def _rotation_due(self) -> bool:
+        """
+            Check if the browser context should be replaced
+            Returns:
+                bool: True once rotate_every pages were served
+        """
+        return (self.context_factory is not None and self.rotate_every > 0
+                and self._served >= self.rotate_every)
+
+    async def _rotate(self):
+        """
+            Replace the browser context and reopen the pages of the pool.
+            Cookies and local storage are carried over to the new context
+        """
+        try:
+            state = None
+            try:
+                state = await self.context.storage_state()
+            except Exception as e:
+                self.logger.warning(f"Could not save browser storage state: {str(e)}")
+            while not self._pages.empty():
+                self._uses.pop(self._pages.get_nowait(), None)
+            self._live = 0
+            await self.context.close()
+            self.context = await self.context_factory(state)
+            await self.start()
+            self.logger.info(f"Rotated browser context after {self._served} pages")
+        except Exception as e:
+            # Pages of the new context are opened on demand by _acquire
+            self.logger.error(f"Error rotating browser context: {str(e)}")
+        finally:
+            self._served = 0
+            self._ready.set()
+
+    async def _acquire(self):
+        """
+            Get an idle page, opening a new one if pages were dropped
+            Returns:
+                Page: Playwright page
+        """
+        if self._pages.empty() and self._live < self.size:
+            self._live += 1
+            try:
+                return await self._new_page()
+            except BaseException:
+                self._live -= 1
+                raise
+        return await self._pages.get()
+
+    async def _release(self, page):
+        """
+            Reset a page and return it to the pool.
+            Worn out or broken pages are replaced by a new page
+            Args:
+                page: The page checked out by _acquire
+        """
+        uses = self._uses.pop(page, 0) + 1
+        try:
+            if uses >= self.max_uses or page.is_closed():
+                await page.close()
+                page = await self._new_page()
+            else:
+                await page.goto("about:blank")
+                self._uses[page] = uses
+        except asyncio.CancelledError:
+            self._live -= 1
+            raise
+        except Exception as e:
+            # Dropped pages are opened again on demand by _acquire
+            self.logger.debug(f"Dropping page from pool: {str(e)}")
+            self._live -= 1
+            try:
+                await page.close()
+            except Exception:
+                pass
+            return
+        self._pages.put_nowait(page)
+
+    async def _new_page(self):
+        """
+            Open a page in the browser context
+            Returns:
+                Page: Playwright page
+        """
+        page = await self.context.new_page()
+        self._uses[page] = 0
+        return page
+
+    async def close(self):
+        """
+            Close all idle pages of the pool
+        """
+        while not self._pages.empty():
+            page = self._pages.get_nowait()
+            self._uses.pop(page, None)
+            self._live -= 1
+            try:
+                await page.close()
+            except Exception as e:
+                self.logger.debug(f"Error closing page: {str(e)}")
@@ -1,51 +1,126 @@
 import hashlib
 import asyncio
+import functools
+import re
+import threading
+import time
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from urllib.robotparser import RobotFileParser
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
 from config import config
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
 from storage.document_store import DocumentStore
+from .page_pool import PagePool
 
 # Constants
 DEFAULT_USER_AGENT = config.get_scraper_useragent()
-DEFAULT_CRAWL_DELAY = config.get_config()["SCRAPE_CONFIGURATION"].get("crawl_delay", 2)  # Default crawl delay in seconds
-DEFAULT_MAX_PAGES = config.get_config()["SCRAPE_CONFIGURATION"].get("max_pages", 200)  # Default maximum pages to scrape
-MAX_CONCURRENT_PAGES = config.get_config()["SCRAPE_CONFIGURATION"].get("concurrency", 25)  # Default number of concurrent requests
+DEFAULT_CRAWL_DELAY = config.scrape.crawl_delay  # Default crawl delay in seconds
+DEFAULT_MAX_PAGES = config.scrape.max_pages  # Default maximum pages to scrape
+MAX_CONCURRENT_PAGES = config.scrape.concurrency  # Default number of concurrent requests
+PAGE_MAX_USES = config.scrape.page_max_uses  # URLs loaded in a page before it is replaced
+CONTEXT_MAX_PAGES = config.scrape.context_max_pages  # URLs loaded in a browser context before it is replaced
+NAVIGATION_TIMEOUT_MS = config.scrape.navigation_timeout_ms  # Time allowed to load a page's DOM
+NETWORK_IDLE_TIMEOUT_MS = config.scrape.network_idle_timeout_ms  # Time allowed for late requests to settle
+BLOCK_RESOURCES = config.scrape.block_resources  # Skip downloads which do not contribute text
+STORE_BATCH_SIZE = config.scrape.store_batch_size  # Pages embedded and stored together
+HASH_SLICE_SIZE = 1 << 16  # Characters encoded and hashed at a time
+ROBOTS_CACHE_TTL_SECONDS = 6 * 60 * 60  # How long a parsed robots.txt is reused
+
+# Query parameters which only track the referrer of a link
+_TRACKING_PARAMS = re.compile(r"(?:^|(?<=&))(?:utm_\w+|gclid|fbclid|mc_cid|mc_eid)=[^&]*(?:&|$)")
+
+# Parsed robots.txt files shared by all scrapers, keyed by robots.txt URL.
+# A None parser records a failed fetch, retried once the entry expires
+_ROBOTS_CACHE: Dict[str, Tuple[Optional[RobotFileParser], float]] = {}
+_ROBOTS_CACHE_LOCK = threading.Lock()
 
 
 class WebsiteScraper:
+    # Resources not needed to read the text and links of a page
+    _BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
     def __init__(self, base_url: str, user_agent: str = DEFAULT_USER_AGENT, collection_name: str = "website_content", override_robots: bool = False):
         self.logger = config.get_logger(__name__)
         self.document_store = DocumentStore(collection_name=collection_name)
         self.scraper_id = collection_name
         self.base_url = base_url
+        # Prefixes of links that belong to the website
+        self._base_prefixes = (base_url,)
         self.user_agent = user_agent
         self.visited_urls = set()
-        self.urls_to_scrape = []
+        # Frontier of URLs waiting to be scraped, in discovery order,
+        # and every URL queued during the current run for O(1) lookups
+        self.urls_to_scrape = asyncio.Queue()
+        self._queued_urls = set()
+        # Scraped pages waiting to be stored as one batch
+        self._pending_documents = []
         self.override_robots = override_robots
-        self.robots_parser = self._setup_robots_parser()
-        self.semaphore = None
+        # Fetched without blocking the event loop when a scrape starts
+        self.robots_parser = None
+        self._robots_ready: Optional[asyncio.Future] = None
         self.stop_triggered = False
-        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+        # Guards stop_triggered against a run starting or ending
+        self._run_lock = threading.Lock()
+        self._running = False
         self.last_scraped_time = None
+        # Scheduler job re-running this scraper, when scheduled
+        self.job = None
 
     def _setup_robots_parser(self) -> RobotFileParser:
         """
-            Setup and fetch robots.txt rules
+            Setup and fetch robots.txt rules.
+            Rules fetched by another scraper of the same host are reused
+            until they expire
             Returns:
                 RobotFileParser: Parsed robots.txt rules
         """
-        parser = RobotFileParser()
-        robots_url = urljoin(self.base_url, "/robots.txt")
-        parser.set_url(robots_url)
+        parsed_url = urlparse(self.base_url)
+        robots_url = f"{parsed_url.scheme}://{parsed_url.netloc}/robots.txt"
+        with _ROBOTS_CACHE_LOCK:
+            cached = _ROBOTS_CACHE.get(robots_url)
+        if cached is not None and cached[1] > time.monotonic():
+            parser = cached[0]
+            self.logger.debug(f"Using cached robots.txt from {robots_url}")
+            # Unread parsers disallow every URL, like a failed fetch
+            return parser if parser is not None else self._new_robots_parser(robots_url)
+
+        parser = self._new_robots_parser(robots_url)
         try:
             parser.read()
             self.logger.info(f"Successfully parsed robots.txt from {robots_url}")
+            cached_parser = parser
         except Exception as e:
             self.logger.warning(f"Could not fetch robots.txt: {str(e)}")
+            cached_parser = None
+        with _ROBOTS_CACHE_LOCK:
+            _ROBOTS_CACHE[robots_url] = (cached_parser, time.monotonic() + ROBOTS_CACHE_TTL_SECONDS)
+        return parser
+
+    async def _ensure_robots(self) -> RobotFileParser:
+        """
+            Fetch robots.txt rules on a worker thread.
+            Concurrent calls share a single fetch
+            Returns:
+                RobotFileParser: Parsed robots.txt rules
+        """
+        if self._robots_ready is None:
+            self._robots_ready = asyncio.ensure_future(
+                asyncio.to_thread(self._setup_robots_parser))
+        self.robots_parser = await self._robots_ready
+        return self.robots_parser
+
+    def _new_robots_parser(self, robots_url: str) -> RobotFileParser:
+        """
+            Create a robots.txt parser which has not been read yet
+            Args:
+                robots_url (str): URL of the robots.txt file
+            Returns:
+                RobotFileParser: The parser
+        """
+        parser = RobotFileParser()
+        parser.set_url(robots_url)
         return parser
 
     def _can_fetch(self, url: str) -> bool:
@@ -67,208 +142,331 @@ class WebsiteScraper:
 
     async def scrape_website(self, max_pages: int = DEFAULT_MAX_PAGES):
         """
-            Scrape website and store content
+            Scrape website and store content. Once the scraper is stopped
+            the document store is closed here, on the thread of the run,
+            so that no write of the run hits a closed client
+            Args:
+                max_pages (int): Maximum number of pages to scrape
+        """
+        with self._run_lock:
+            if self.stop_triggered:
+                return
+            self._running = True
+        try:
+            await self._crawl(max_pages)
+        finally:
+            with self._run_lock:
+                self._running = False
+                stopped = self.stop_triggered
+            if stopped:
+                self.document_store.close()
+
+    async def _crawl(self, max_pages: int):
+        """
+            Crawl the website with a pool of workers and store the content
             Args:
                 max_pages (int): Maximum number of pages to scrape
         """
         self.last_scraped_time = datetime.now()
         self.visited_urls.clear()
+        # Created per run, scrapes may run on a different event loop each time
+        self.urls_to_scrape = asyncio.Queue()
+        self._queued_urls.clear()
+        self._pending_documents = []
         self.logger.info(f"Starting scrape for {self.base_url} with max pages: {max_pages}")
+        # Rules are looked up again on every run so expired ones are refreshed
+        self._robots_ready = None
+        await self._ensure_robots()
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=True)
             # Create a new browser context with custom user agent
             self.logger.info(f"Using user agent: {self.user_agent}")
             self.logger.info(f"Using crawl delay: {DEFAULT_CRAWL_DELAY} seconds")
-            context = await browser.new_context(
-                user_agent=self.user_agent,
-                viewport={'width': 1920, 'height': 1080}
-            )
+            context = await self._new_context(browser)
 
             self.logger.info(f"Browser context created with user agent: {self.user_agent}")
+            # Pages are reused across URLs, one per worker. The context is
+            # replaced periodically to bound the memory held by the browser
+            pages = PagePool(
+                context, MAX_CONCURRENT_PAGES, PAGE_MAX_USES,
+                context_factory=functools.partial(self._new_context, browser),
+                rotate_every=CONTEXT_MAX_PAGES
+            )
 
             try:
+                await pages.start()
                 crawl_delay = self.robots_parser.crawl_delay(self.user_agent)
                 if crawl_delay is None:
                     crawl_delay = DEFAULT_CRAWL_DELAY
 
                 # Start with the base URL
-                self.urls_to_scrape = [self.base_url]
-                first_run = True
-                while self.urls_to_scrape and len(self.visited_urls) < max_pages:
-                    # Process URLs concurrently in batches
-                    if not first_run:
-                        batch = self.urls_to_scrape[:MAX_CONCURRENT_PAGES]
-                        self.urls_to_scrape = self.urls_to_scrape[MAX_CONCURRENT_PAGES:]
-                    else:
-                        batch = self.urls_to_scrape
-                        first_run = False
-
-                    self.logger.info(f"URLs to scrape: {len(self.urls_to_scrape)}, Visited: {len(self.visited_urls)}")
-
-                    # Create tasks for concurrent scraping
-                    tasks = [
-                        self._scrape_page_with_semaphore(
-                            context, url,
-                            max_pages, crawl_delay)
-                        for url in batch
-                        if url not in self.visited_urls and self._can_fetch(url)
-                    ]
-
-                    self.logger.info(f"Starting batch scrape for {len(tasks)} URLs")
-                    # Wait for batch to complete
-                    await asyncio.gather(*tasks)
+                self._enqueue(self.base_url)
+                done = asyncio.Event()
+                workers = [
+                    asyncio.create_task(self._scrape_worker(
+                        pages, self.urls_to_scrape, done,
+                        max_pages, crawl_delay))
+                    for _ in range(MAX_CONCURRENT_PAGES)
+                ]
+                self.logger.info(f"Started {len(workers)} scrape workers")
+
+                # Run until the frontier is exhausted or a worker signals
+                # that the scraper stopped. Once the page limit is reached
+                # the workers finish their pages and drain the frontier
+                finished = asyncio.create_task(self.urls_to_scrape.join())
+                stopped = asyncio.create_task(done.wait())
+                try:
+                    await asyncio.wait([finished, stopped],
+                                       return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for task in [finished, stopped, *workers]:
+                        task.cancel()
+                    await asyncio.gather(finished, stopped, *workers,
+                                         return_exceptions=True)
+                if not self.stop_triggered:
+                    await self._flush_documents()
+                self.logger.info(f"Scrape finished, visited: {len(self.visited_urls)}")
 
             except Exception as e:
                 self.logger.error(f"Error during scraping: {str(e)}")
             finally:
-                await context.close()
+                await pages.close()
+                await pages.context.close()
                 await browser.close()
 
-    async def _scrape_page_with_semaphore(self, context, url: str,
-                                          max_pages: int, crawl_delay: float):
+    async def _new_context(self, browser, storage_state: Optional[Dict] = None):
         """
-            Wrapper to handle semaphore for concurrent page scraping
+            Create a browser context with the scraper's user agent
             Args:
-                context: Playwright browser context
-                url (str): URL to scrape
+                browser: Playwright browser
+                storage_state (Dict): Cookies and local storage to restore
+            Returns:
+                BrowserContext: The new browser context
+        """
+        context = await browser.new_context(
+            user_agent=self.user_agent,
+            viewport={'width': 1920, 'height': 1080},
+            storage_state=storage_state
+        )
+        if BLOCK_RESOURCES:
+            # Routed once on the context, routes per page are known to leak
+            await context.route("**/*", self._route_request)
+        return context
+
+    async def _route_request(self, route):
+        """
+            Abort requests for resources which do not contribute text
+            Args:
+                route: Playwright route of the intercepted request
+        """
+        if route.request.resource_type in self._BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _scrape_worker(self, pages: PagePool, queue: asyncio.Queue,
+                             done: asyncio.Event, max_pages: int,
+                             crawl_delay: float):
+        """
+            Scrape URLs from the frontier until the run ends.
+            Each worker picks up the next URL as soon as its page is done,
+            the number of workers bounds the concurrency
+            Args:
+                pages (PagePool): Pages to load the URLs in
+                queue (asyncio.Queue): Frontier of URLs to scrape
+                done (asyncio.Event): Set once the scraper was stopped
                 max_pages (int): Maximum number of pages to scrape
                 crawl_delay (float): Delay between requests
         """
-        async with self.semaphore:
-            await self._scrape_page(context, url, max_pages, crawl_delay)
+        while True:
+            url = await queue.get()
+            try:
+                if self.stop_triggered:
+                    done.set()
+                    return
+                if url not in self.visited_urls and self._can_fetch(url):
+                    await self._scrape_page(pages, url, max_pages, crawl_delay)
+            finally:
+                queue.task_done()
 
-    async def _scrape_page(self, context, url: str,
+    async def _scrape_page(self, pages: PagePool, url: str,
                            max_pages: int, crawl_delay: float):
         """
             Scrape a single page.
-            Returns immediately if the URL has already been visited.
+            Returns immediately if the URL has already been visited
+            or the page limit has been reached.
             This method is responsible for navigating to the page,
             extracting content, and finding new links.
             Args:
-                context: Playwright browser context
+                pages (PagePool): Pages to load the URL in
                 url (str): URL to scrape
                 max_pages (int): Maximum number of pages to scrape
                 crawl_delay (float): Delay between requests
         """
-        if url in self.visited_urls:
+        if url in self.visited_urls or len(self.visited_urls) >= max_pages:
             return
+        # Marked before the first await so no other worker loads it again
+        self.visited_urls.add(url)
 
         try:
             self.logger.info(f"Scraping: {url}")
-            page = await context.new_page()
-
-            try:
-                response = await page.goto(url, wait_until="networkidle")
+            async with pages.page() as page:
+                response = await page.goto(url, wait_until="domcontentloaded",
+                                           timeout=NAVIGATION_TIMEOUT_MS)
+                try:
+                    # Give scripts rendering the content a moment to finish,
+                    # pages with trackers or polling may never go idle
+                    await page.wait_for_load_state("networkidle",
+                                                   timeout=NETWORK_IDLE_TIMEOUT_MS)
+                except PlaywrightTimeoutError:
+                    self.logger.debug(f"Network not idle after {NETWORK_IDLE_TIMEOUT_MS} ms: {url}")
                 await asyncio.sleep(crawl_delay)
 
-                self.visited_urls.add(url)
-
-                content = await self._extract_content(response, page)
+                content, new_links = await self._extract_page(response, page)
                 if content:
-                    self.document_store.store_documents([content])
+                    self._pending_documents.append(content)
+                    if len(self._pending_documents) >= STORE_BATCH_SIZE:
+                        await self._flush_documents()
 
                 # Find and follow allowed links
-                new_links = await self._extract_links(page)
-                self.urls_to_scrape.extend([
-                    link for link in new_links
-                    if (link not in self.visited_urls and
-                        link not in self.urls_to_scrape and
-                        self._can_fetch(link))
-                ])
-            except asyncio.exceptions.CancelledError as ce:
-                self.logger.error(f"Cancelled the scraping for {url}: {ce}")
-            finally:
-                await page.close()
-
+                for link in new_links:
+                    if link not in self._queued_urls and self._can_fetch(link):
+                        self._enqueue(link)
+        except asyncio.exceptions.CancelledError as ce:
+            self.logger.error(f"Cancelled the scraping for {url}: {ce}")
+            raise
         except Exception as e:
             self.logger.error(f"Error scraping {url}: {e}")
 
-    async def _extract_content(self, response, page) -> Dict:
+    async def _flush_documents(self):
+        """
+            Store the pending pages with one batched call to the document store
+        """
+        documents, self._pending_documents = self._pending_documents, []
+        if documents:
+            await self.document_store.astore_documents(documents)
+
+    def _enqueue(self, url: str):
+        """
+            Add a URL to the frontier unless it was already queued in this run
+            Args:
+                url (str): URL to scrape
+        """
+        if url in self._queued_urls or url in self.visited_urls:
+            return
+        self._queued_urls.add(url)
+        self.urls_to_scrape.put_nowait(url)
+
+    # Containers holding the main content of a page
+    _MAIN_SELECTOR = "main[id*='article'], main[id*='content'], main[class*='article'], main[class*='content'], [role='main']"
+    # Elements removed when a page has no main content container
+    _NOISE_SELECTOR = "nav, header, footer, #footer, #header, .navigation, .menu, .sidebar"
+
+    # Collects the title, text and link targets of a page in a single
+    # round trip to the browser. Non-content elements are only removed
+    # when the page has no main content container
+    _EXTRACT_SCRIPT = """([mainSelector, noiseSelector]) => {
+        let container = document.querySelector(mainSelector);
+        if (!container && document.body) {
+            document.querySelectorAll(noiseSelector).forEach(node => node.remove());
+            container = document.body;
+        }
+        const links = Array.from(document.querySelectorAll("a[href]"), a => a.getAttribute("href"));
+        return {title: document.title, text: container ? container.innerText : "", links};
+    }"""
+
+    async def _extract_page(self, response, page) -> Tuple[Optional[Dict], List[str]]:
         """
-            Extract content from page
+            Extract content and links from page
             Args:
                 response: Playwright response object
                 page: Playwright page object
             Returns:
-                Dict: Extracted content with URL, title, and text
+                Tuple[Dict, List[str]]: Extracted content with URL, title, and text,
+                    and the list of absolute URLs found on the page
         """
         try:
-            title = await page.title()
-            # Try specific content containers first
-            main_content = await page.query_selector("main[id*='article'], main[id*='content'], main[class*='article'], main[class*='content'], [role='main']")
-            if main_content:
-                content_text = await main_content.inner_text()
-            else:
-                # Fall back to body content, excluding navigation and footer
-                body_content = await page.query_selector("body")
-                if body_content:
-                    # Remove common non-content elements
-                    for selector in ["nav", "header", "footer", "#footer", "#header", ".navigation", ".menu", ".sidebar"]:
-                        elements = await page.query_selector_all(selector)
-                        for element in elements:
-                            await element.evaluate('node => node.remove()')
-                    content_text = await body_content.inner_text()
-                else:
-                    content_text = ""
-            # print(f"Extracted content from {page.url}: {content_text[:1000]}...")  # Log first 100 chars for debugging
-            # Log content length for debugging
-            self.logger.debug(f"Extracted content length from {page.url}: {len(content_text)}")
-            return {
-                "url": page.url,
-                "title": title,
-                "content": content_text,
-                "content_hash": self._generate_content_hash(content_text),
-                "last_modified": response.headers.get("last-modified", None),
-                "metadata": {
-                    "scraped_at": str(datetime.now())
-                }
-            }
+            result = await page.evaluate(
+                self._EXTRACT_SCRIPT, [self._MAIN_SELECTOR, self._NOISE_SELECTOR])
         except Exception as e:
             self.logger.error(f"Error extracting content: {str(e)}")
-            return None
+            return None, []
 
-    async def _extract_links(self, page) -> List[str]:
-        """
-            Extract links from page
-            Args:
-                page: Playwright page object
-            Returns:
-                List[str]: List of absolute URLs found on the page
-        """
-        links = []
-        elements = await page.query_selector_all("a[href]")
+        content_text = result["text"] or ""
+        self.logger.debug(f"Extracted content length from {page.url}: {len(content_text)}")
+        content = {
+            "url": page.url,
+            "title": result["title"],
+            "content": content_text,
+            "content_hash": self._generate_content_hash(content_text),
+            "last_modified": response.headers.get("last-modified", None),
+            "metadata": {
+                # Nanoseconds since the epoch, formatted by consumers as needed
+                "scraped_at": time.time_ns()
+            }
+        }
 
-        for element in elements:
-            href = await element.get_attribute("href")
+        links = []
+        for href in result["links"]:
+            href = self._normalize_link(href)
             if not href:
                 continue
-            if href and href.startswith(self.base_url):
+            if href.startswith(self._base_prefixes):
                 links.append(href)
-            elif href and href.startswith("/"):
+            elif href[0] == "/" and not href.startswith("//"):
                 # Handle relative links
-                full_url = urljoin(self.base_url, href)
-                links.append(full_url)
-        return links
+                links.append(urljoin(self.base_url, href))
+        return content, links
+
+    def _normalize_link(self, href: str) -> str:
+        """
+            Strip the fragment and tracking parameters from a link so that
+            variants of the same page are only queued once
+            Args:
+                href (str): Link target as found on the page
+            Returns:
+                str: The normalized link, empty for links within the page
+        """
+        if not href:
+            return ""
+        href = href.partition("#")[0]
+        path, separator, query = href.partition("?")
+        if separator:
+            query = _TRACKING_PARAMS.sub("", query).rstrip("&")
+            href = f"{path}?{query}" if query else path
+        return href
 
     def _generate_content_hash(self, content: str) -> str:
         """
-            Generate SHA-256 hash of content for change detection
+            Generate SHA-256 hash of content for change detection.
+            The content is encoded and hashed in slices so that large pages
+            are never copied as a whole
             Args:
                 content (str): Content to hash
             Returns:
                 str: SHA-256 hash of the content
         """
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+        digest = hashlib.sha256()
+        for start in range(0, len(content), HASH_SLICE_SIZE):
+            digest.update(content[start:start + HASH_SLICE_SIZE].encode('utf-8'))
+        return digest.hexdigest()
 
     def stop(self):
         """
-            Stop the scraper and scheduler
+            Stop the scraper and scheduler. A running scrape closes the
+            document store when it ends, otherwise it is closed right away
         """
         self.logger.info("Stopping website scraper")
-        self.stop_triggered = True
+        with self._run_lock:
+            self.stop_triggered = True
+            running = self._running
         self.visited_urls.clear()
-        self.urls_to_scrape.clear()
-        self.document_store.close()
+        # Running workers see stop_triggered and end the run, which
+        # drops the old frontier
+        self.urls_to_scrape = asyncio.Queue()
+        self._queued_urls.clear()
+        if not running:
+            self.document_store.close()
 
     def progress(self):
         """
@@ -278,7 +476,7 @@ class WebsiteScraper:
         """
         return {
             "visited_urls": len(self.visited_urls),
-            "remaining_urls": len(self.urls_to_scrape),
+            "remaining_urls": self.urls_to_scrape.qsize(),
             "last_scraped_time": self.last_scraped_time.isoformat() if self.last_scraped_time else None,
         }
 
@@ -18,6 +18,8 @@ setup(
         "pytest-asyncio>=0.21.0",
         "fastmcp>=2.8.1",
         "fastapi>=0.115.14",
-        "langchain_ollama>=0.3.3"
+        "httpx>=0.27.0",
+        "langchain_ollama>=0.3.3",
+        "orjson>=3.9.0"
     ],
 )
@@ -1,5 +1,11 @@
-from .document_store import DocumentStore
+from .document_store import DocumentStore, get_embeddings, create_client
+from .query_cache import QueryCache
+from .batch_searcher import BatchSearcher
 
 __all__ = [
-    "DocumentStore"
+    "DocumentStore",
+    "get_embeddings",
+    "create_client",
+    "QueryCache",
+    "BatchSearcher"
 ]
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from .document_store import DocumentStore
+
+
+class BatchSearcher:
+    """
+        Coalesce concurrent searches against one document store.
+        Queries arriving within a short window are embedded with a
+        single model call and sent to Qdrant as one batch search.
+    """
+
+    def __init__(self, store: DocumentStore, max_batch_size: int = 16,
+                 max_wait_seconds: float = 0.01, top_k: int = 5):
+        self.store = store
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.top_k = top_k
+        self.logger = logging.getLogger(__name__)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, query: str) -> Tuple[List[float], List[Dict]]:
+        """
+            Queue a query for the next batch and wait for its results
+            Args:
+                query (str): The search query
+            Returns:
+                Tuple[List[float], List[Dict]]: The query embedding and
+                    the matching documents
+        """
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, future))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        """
+            Wait for a query and gather the ones arriving within the window
+            Returns:
+                List[Tuple[str, asyncio.Future]]: Queued queries and futures
+        """
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        """
+            Background task dispatching batches to the document store
+        """
+        while True:
+            batch = await self._collect_batch()
+            queries = [query for query, _ in batch]
+            try:
+                embeddings, results = await asyncio.to_thread(
+                    self.store.search_documents_batch, queries, self.top_k)
+            except Exception as e:
+                self.logger.error(f"Error in batch search: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.logger.debug(f"Searched batch of {len(batch)} queries")
+            for (_, future), embedding, docs in zip(batch, embeddings, results):
+                if not future.done():
+                    future.set_result((embedding, docs))
+
+    async def close(self):
+        """
+            Stop the background batching task
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
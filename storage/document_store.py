@@ -5,26 +5,148 @@ from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from qdrant_client.http.models import SearchParams
 from config import config
-from typing import List, Dict
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+import asyncio
+import functools
+import hashlib
+import itertools
 import logging
+import threading
+import time
+import uuid
+
+
+def _embedding_device() -> str:
+    """
+        Get the device the embedding model runs on
+        Returns:
+            str: The configured device, otherwise "cuda" when a GPU
+                is available and "cpu" if not
+    """
+    if config.vector_db.embedding_device:
+        return config.vector_db.embedding_device
+    try:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except ImportError:
+        return "cpu"
+
+
+@functools.lru_cache(maxsize=1)
+def get_embeddings() -> HuggingFaceEmbeddings:
+    """
+        Get the embedding model shared by all document stores.
+        The model weights are loaded once per process
+        Returns:
+            HuggingFaceEmbeddings: The sentence transformer embeddings
+    """
+    device = _embedding_device()
+    embeddings = HuggingFaceEmbeddings(
+        model_name="all-MiniLM-L6-v2",
+        model_kwargs={"device": device},
+        encode_kwargs={
+            "batch_size": config.vector_db.embedding_batch_size,
+            "normalize_embeddings": True
+        }
+    )
+    if device.startswith("cuda") and config.vector_db.embedding_fp16:
+        # Half precision weights on the GPU, the sentence transformer
+        # is only reachable through the private _client attribute
+        embeddings._client.half()
+    logging.getLogger(__name__).info(f"Loaded embedding model on {device}")
+    return embeddings
+
+
+@functools.lru_cache(maxsize=1)
+def get_text_splitter() -> RecursiveCharacterTextSplitter:
+    """
+        Get the text splitter shared by all document stores
+        Returns:
+            RecursiveCharacterTextSplitter: Splitter for document chunks
+    """
+    return RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+        length_function=len,
+    )
+
+
+def create_client() -> QdrantClient:
+    """
+        Create a Qdrant client from the vector database configuration
+        Returns:
+            QdrantClient: Client connected to the configured Qdrant server
+    """
+    return QdrantClient(
+        host=config.vector_db.host,
+        port=config.vector_db.port,
+        grpc_port=config.vector_db.grpc_port,
+        prefer_grpc=config.vector_db.prefer_grpc
+    )
+
+
+def _batched(iterable: Iterable, size: int) -> Iterator[List]:
+    """
+        Split an iterable into lists of at most size items
+        Args:
+            iterable (Iterable): Items to split
+            size (int): Maximum number of items per list
+        Yields:
+            List: The next window of items
+    """
+    iterator = iter(iterable)
+    while window := list(itertools.islice(iterator, size)):
+        yield window
+
+
+def point_id(text: str) -> str:
+    """
+        Derive a stable point ID from the content of a chunk.
+        Unlike hash(), the ID is the same in every process so
+        re-ingesting unchanged content overwrites existing points
+        Args:
+            text (str): Text of the chunk
+        Returns:
+            str: UUID built from a 128-bit BLAKE2b digest of the text
+    """
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    return str(uuid.UUID(bytes=digest))
 
 
 class DocumentStore:
-    def __init__(self, collection_name: str = "default_collection"):
+    # Payload fields returned with search results
+    _RESULT_PAYLOAD = models.PayloadSelectorInclude(include=["text", "metadata"])
+
+    def __init__(self, collection_name: str = "default_collection", client: QdrantClient = None):
         self.collection_name = collection_name
-        self.embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
+        self.query_cache_collection = f"query_cache_{collection_name}"
+        self.embeddings = get_embeddings()
+        self.text_splitter = get_text_splitter()
 
-        self.vector_config = config.get_config().get(config.VECTOR_DB_CONFIGURATION)
-        # Initialize Qdrant client
-        self.client = QdrantClient(
-            host=self.vector_config.get("host", "localhost"),
-            port=self.vector_config.get("port", 6333)
+        self.vector_config = config.vector_db
+        # Size of the HNSW candidate list at search time, trades recall for latency
+        self.hnsw_ef = self.vector_config.hnsw_ef
+        # Quantized vectors are searched first, the top candidates are
+        # then rescored with the original vectors to preserve recall
+        quantization = None
+        if self.vector_config.quantization:
+            quantization = models.QuantizationSearchParams(
+                rescore=True,
+                oversampling=self.vector_config.oversampling
+            )
+        self.search_params = SearchParams(
+            hnsw_ef=self.hnsw_ef,
+            exact=False,
+            quantization=quantization
         )
+        # Whether the semantic query cache collection is known to exist
+        self._query_cache_ready = False
+        # Content hashes of the stored documents, loaded on first use
+        self._seen_hashes: Optional[set] = None
+        self._seen_hashes_lock = threading.Lock()
+        # Initialize Qdrant client, unless a shared one is provided
+        self._owns_client = client is None
+        self.client = create_client() if client is None else client
 
         # Setup logging
         self.logger = logging.getLogger(__name__)
@@ -32,21 +154,43 @@ class DocumentStore:
         # Ensure collection exists
         self._create_collection_if_not_exists()
 
-    def _create_collection_if_not_exists(self):
+    def _create_collection_if_not_exists(self, collection_name: str = None):
         """
             Create Qdrant collection if it doesn't exist
+            Args:
+                collection_name (str): Collection to create,
+                    defaults to the document collection
         """
+        collection_name = collection_name or self.collection_name
         try:
-            self.client.get_collection(self.collection_name)
+            self.client.get_collection(collection_name)
         except Exception:
             self.client.create_collection(
-                collection_name=self.collection_name,
+                collection_name=collection_name,
                 vectors_config=models.VectorParams(
-                    size=self.vector_config.get("vector_size", 384),  # all-MiniLM-L6-v2 embedding size
+                    size=self.vector_config.vector_size,  # all-MiniLM-L6-v2 embedding size
                     distance=models.Distance.COSINE
-                )
+                ),
+                quantization_config=self._quantization_config()
+            )
+            self.logger.info(f"Created collection: {collection_name}")
+
+    def _quantization_config(self) -> Optional[models.ScalarQuantization]:
+        """
+            Get the quantization applied to new collections
+            Returns:
+                models.ScalarQuantization: int8 scalar quantization kept
+                    in RAM, or None when quantization is disabled
+        """
+        if not self.vector_config.quantization:
+            return None
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True
             )
-        self.logger.info(f"Created collection: {self.collection_name}")
+        )
 
     def store_documents(self, documents: List[Dict]):
         """
@@ -58,7 +202,56 @@ class DocumentStore:
                 - title (str): Title of the document
                 - metadata (Dict): Additional metadata for the document
         """
+        seen_hashes = self._get_seen_hashes()
+        new_hashes = set()
+        stored = True
+        count = 0
+        # Chunks are produced lazily and embedded and stored one window
+        # at a time, so only a window of chunks and vectors is in memory
+        chunks = self._iter_chunks(documents, seen_hashes, new_hashes)
+        for window in _batched(chunks, self.vector_config.upsert_batch_size):
+            try:
+                texts = [chunk.page_content for chunk in window]
+                embeddings = self.embeddings.embed_documents(texts)
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=models.Batch(
+                        ids=[point_id(text) for text in texts],
+                        vectors=embeddings,
+                        payloads=[{
+                            "text": chunk.page_content,
+                            "metadata": chunk.metadata
+                        } for chunk in window]
+                    ),
+                    wait=False
+                )
+                count += len(window)
+            except Exception as e:
+                stored = False
+                self.logger.error(f"Error storing documents: {str(e)}")
+        if stored:
+            with self._seen_hashes_lock:
+                seen_hashes.update(new_hashes)
+        self.logger.debug(f"Stored {count} chunks from {len(documents)} documents")
+
+    def _iter_chunks(self, documents: List[Dict], seen_hashes: set,
+                     new_hashes: set) -> Iterator[Document]:
+        """
+            Split documents into chunks, skipping unchanged documents
+            Args:
+                documents (List[Dict]): Documents to be stored
+                seen_hashes (set): Content hashes of the stored documents
+                new_hashes (set): Receives the content hashes of the
+                    documents which were split
+            Yields:
+                Document: Chunks of the changed documents
+        """
         for doc in documents:
+            content_hash = doc.get("content_hash")
+            if content_hash and content_hash in seen_hashes:
+                # Unchanged since it was last stored
+                self.logger.debug(f"Skipping unchanged document: {doc.get('url', 'unknown')}")
+                continue
             try:
                 # Create LangChain document
                 langchain_doc = Document(
@@ -74,26 +267,85 @@ class DocumentStore:
 
                 # Split document into chunks
                 doc_chunks = self.text_splitter.split_documents([langchain_doc])
+            except Exception as e:
+                self.logger.error(f"Error splitting document: {str(e)} {doc.get('url', 'unknown')}")
+                continue
+            if content_hash:
+                new_hashes.add(content_hash)
+            yield from doc_chunks
 
-                # Create embeddings and store in Qdrant
-                for chunk in doc_chunks:
-                    embedding = self.embeddings.embed_query(chunk.page_content)
-                    self.client.upsert(
+    def _get_seen_hashes(self) -> set:
+        """
+            Get the content hashes of the documents already stored,
+            reading them from the collection on first use
+            Returns:
+                set: Content hashes of the stored documents
+        """
+        with self._seen_hashes_lock:
+            if self._seen_hashes is not None:
+                return self._seen_hashes
+            seen_hashes = set()
+            try:
+                offset = None
+                while True:
+                    points, offset = self.client.scroll(
                         collection_name=self.collection_name,
-                        points=models.Batch(
-                            ids=[abs(hash(chunk.page_content))],
-                            vectors=[embedding],
-                            payloads=[{
-                                "text": chunk.page_content,
-                                "metadata": chunk.metadata
-                            }]
-                        )
+                        limit=1000,
+                        offset=offset,
+                        with_payload=models.PayloadSelectorInclude(include=["metadata.content_hash"]),
+                        with_vectors=False
                     )
-                self.logger.debug(f"Stored document: {doc['url']}")
+                    for point in points:
+                        content_hash = (point.payload or {}).get("metadata", {}).get("content_hash")
+                        if content_hash:
+                            seen_hashes.add(content_hash)
+                    if offset is None:
+                        break
+                self.logger.info(f"Loaded {len(seen_hashes)} content hashes from {self.collection_name}")
             except Exception as e:
-                self.logger.error(f"Error storing document: {str(e)} {doc.get('url', 'unknown')}")
+                self.logger.warning(f"Could not load content hashes: {str(e)}")
+            self._seen_hashes = seen_hashes
+            return seen_hashes
+
+    async def astore_documents(self, documents: List[Dict]):
+        """
+            Store documents without blocking the event loop.
+            Embedding and the upserts run on a worker thread
+            Args:
+                documents (List[Dict]): Documents to be stored,
+                    see store_documents
+        """
+        await asyncio.to_thread(self.store_documents, documents)
+
+    def embed_query(self, query: str) -> List[float]:
+        """
+            Create the embedding for a search query
+            Args:
+                query (str): The search query
+            Returns:
+                List[float]: The query embedding
+        """
+        return self.embeddings.embed_query(query)
+
+    def _search_params(self, hnsw_ef: int = None) -> SearchParams:
+        """
+            Get the search parameters for a query
+            Args:
+                hnsw_ef (int): Size of the HNSW candidate list,
+                    defaults to the configured size
+            Returns:
+                SearchParams: The search parameters
+        """
+        if hnsw_ef is None or hnsw_ef == self.hnsw_ef:
+            return self.search_params
+        return SearchParams(
+            hnsw_ef=hnsw_ef,
+            exact=False,
+            quantization=self.search_params.quantization
+        )
 
-    def search_documents(self, query: str, top_k: int = 5, similarity_threshold: float = None) -> List[Dict[str, any]]:
+    def search_documents(self, query: str, top_k: int = 5, similarity_threshold: float = None,
+                         embedding: List[float] = None, hnsw_ef: int = None) -> List[Dict[str, any]]:
         """
             Search for documents in the vector database
             Args:
@@ -101,6 +353,10 @@ class DocumentStore:
                 top_k (int): Number of top results to return
                 similarity_threshold (float):
                     Minimum similarity score to filter results
+                embedding (List[float]): Precomputed query embedding,
+                    computed from the query when not provided
+                hnsw_ef (int): Size of the HNSW candidate list, smaller
+                    values are faster but may miss matches
         """
         if not query:
             self.logger.warning("Empty query provided for search.")
@@ -110,31 +366,166 @@ class DocumentStore:
                                 defaulting to 5.")
             top_k = 5
         try:
-            embedding = self.embeddings.embed_query(query)
+            if embedding is None:
+                embedding = self.embed_query(query)
             results = self.client.search(
                 collection_name=self.collection_name,
                 query_vector=embedding,
                 limit=top_k,
-                search_params=SearchParams(
-                    hnsw_ef=128  # Use default HNSW algorithm
-                ),
-                score_threshold=similarity_threshold if similarity_threshold else 0.0
+                search_params=self._search_params(hnsw_ef),
+                score_threshold=similarity_threshold if similarity_threshold else 0.0,
+                with_payload=self._RESULT_PAYLOAD,
+                with_vectors=False
             )
 
-            return [
-                {
-                    "text": result.payload["text"],
-                    "metadata": result.payload["metadata"],
-                    "score": result.score
-                } for result in results
-            ]
+            return self._format_results(results)
 
         except Exception as e:
             self.logger.error(f"Error searching documents: {str(e)}")
             return []
 
+    def search_documents_batch(self, queries: List[str], top_k: int = 5,
+                               similarity_threshold: float = None,
+                               hnsw_ef: int = None) -> Tuple[List[List[float]], List[List[Dict]]]:
+        """
+            Search for several queries with one embedding call and
+            one Qdrant batch request
+            Args:
+                queries (List[str]): The search queries
+                top_k (int): Number of top results to return per query
+                similarity_threshold (float):
+                    Minimum similarity score to filter results
+                hnsw_ef (int): Size of the HNSW candidate list
+            Returns:
+                Tuple[List[List[float]], List[List[Dict]]]: The query
+                    embeddings and the results of each query, in order
+        """
+        try:
+            embeddings = self.embeddings.embed_documents(queries)
+            search_params = self._search_params(hnsw_ef)
+            batch_results = self.client.search_batch(
+                collection_name=self.collection_name,
+                requests=[
+                    models.SearchRequest(
+                        vector=embedding,
+                        limit=top_k,
+                        params=search_params,
+                        score_threshold=similarity_threshold if similarity_threshold else 0.0,
+                        with_payload=self._RESULT_PAYLOAD,
+                        with_vector=False
+                    ) for embedding in embeddings
+                ]
+            )
+            return embeddings, [self._format_results(results) for results in batch_results]
+
+        except Exception as e:
+            # Raised to the waiting searches instead of answering them
+            # from an empty context while Qdrant is unavailable
+            self.logger.error(f"Error searching documents: {str(e)}")
+            raise
+
+    def _format_results(self, results) -> List[Dict[str, any]]:
+        """
+            Convert Qdrant search hits into plain dictionaries
+            Args:
+                results: Scored points returned by Qdrant
+            Returns:
+                List[Dict[str, any]]: Text, metadata and score of each hit
+        """
+        return [
+            {
+                "text": result.payload["text"],
+                "metadata": result.payload["metadata"],
+                "score": result.score
+            } for result in results
+        ]
+
+    def find_cached_response(self, embedding: List[float], generation: int,
+                             similarity_threshold: float = 0.97,
+                             ttl_seconds: float = 600) -> Optional[Dict]:
+        """
+            Look up the response cached for a semantically similar query
+            Args:
+                embedding (List[float]): Embedding of the incoming query
+                generation (int): Current cache generation of the domain
+                similarity_threshold (float):
+                    Minimum similarity for a cached query to match
+                ttl_seconds (float): Maximum age of a cached response
+            Returns:
+                Dict: The cached response or None on a miss
+        """
+        try:
+            results = self.client.search(
+                collection_name=self.query_cache_collection,
+                query_vector=embedding,
+                limit=1,
+                score_threshold=similarity_threshold,
+                query_filter=models.Filter(
+                    must=[
+                        models.FieldCondition(
+                            key="generation",
+                            match=models.MatchValue(value=generation)
+                        ),
+                        models.FieldCondition(
+                            key="cached_at",
+                            range=models.Range(gte=time.time() - ttl_seconds)
+                        )
+                    ]
+                )
+            )
+        except Exception as e:
+            # Cache collection is created on the first stored response
+            self.logger.debug(f"Semantic cache lookup failed: {str(e)}")
+            return None
+        if not results:
+            return None
+        return results[0].payload["response"]
+
+    def cache_response(self, embedding: List[float], response: Dict, generation: int):
+        """
+            Store a search response for semantic cache lookups
+            Args:
+                embedding (List[float]): Embedding of the query
+                response (Dict): Response returned for the query
+                generation (int): Current cache generation of the domain
+        """
+        try:
+            if not self._query_cache_ready:
+                self._create_collection_if_not_exists(self.query_cache_collection)
+                self._query_cache_ready = True
+            self.client.upsert(
+                collection_name=self.query_cache_collection,
+                points=models.Batch(
+                    ids=[str(uuid.uuid4())],
+                    vectors=[embedding],
+                    payloads=[{
+                        "response": response,
+                        "generation": generation,
+                        "cached_at": time.time()
+                    }]
+                )
+            )
+        except Exception as e:
+            # The collection may have been dropped through another store,
+            # check for it again on the next write
+            self._query_cache_ready = False
+            self.logger.error(f"Error caching response: {str(e)}")
+
+    def clear_cached_responses(self):
+        """
+            Drop all responses cached for semantic lookups
+        """
+        try:
+            self._query_cache_ready = False
+            self.client.delete_collection(self.query_cache_collection)
+            self.logger.info(f"Cleared query cache: {self.query_cache_collection}")
+        except Exception as e:
+            self.logger.error(f"Error clearing query cache: {str(e)}")
+
     def close(self):
-        """Close the Qdrant client connection"""
+        """Close the Qdrant client connection, unless it is shared"""
+        if not self._owns_client:
+            return
         try:
             self.client.close()
             self.logger.info("Closed Qdrant client connection.")
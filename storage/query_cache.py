@@ -0,0 +1,94 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class QueryCache:
+    """
+        In-process LRU cache with TTL for search responses.
+        Entries are keyed on (domain, query) together with a per-domain
+        generation counter, so bumping the generation after a re-scrape
+        makes every previously cached answer for that domain unreachable.
+    """
+
+    def __init__(self, max_size: int = 2000, ttl_seconds: float = 600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def _key(self, domain: str, query: str) -> str:
+        """
+            Build the cache key for a query
+            Args:
+                domain (str): Domain the query is scoped to
+                query (str): The search query
+            Returns:
+                str: Hex digest identifying the entry
+        """
+        raw = f"{domain}|{self.generation(domain)}|{query}"
+        return hashlib.blake2b(raw.encode("utf-8")).hexdigest()
+
+    def generation(self, domain: str) -> int:
+        """
+            Get the current cache generation of a domain
+            Args:
+                domain (str): Domain to look up
+            Returns:
+                int: Generation counter, starting at 0
+        """
+        with self._lock:
+            return self._generations.get(domain, 0)
+
+    def get(self, domain: str, query: str) -> Optional[Any]:
+        """
+            Get a cached response
+            Args:
+                domain (str): Domain the query is scoped to
+                query (str): The search query
+            Returns:
+                Any: The cached response or None on a miss
+        """
+        with self._lock:
+            key = self._key(domain, query)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, domain: str, query: str, value: Any):
+        """
+            Store a response, evicting the least recently used entry
+            when the cache is full
+            Args:
+                domain (str): Domain the query is scoped to
+                query (str): The search query
+                value (Any): Response to cache
+        """
+        with self._lock:
+            key = self._key(domain, query)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, domain: str) -> int:
+        """
+            Invalidate all cached responses of a domain
+            Args:
+                domain (str): Domain whose content changed
+            Returns:
+                int: The new generation of the domain
+        """
+        with self._lock:
+            generation = self._generations.get(domain, 0) + 1
+            self._generations[domain] = generation
+            return generation
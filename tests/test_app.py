@@ -0,0 +1,185 @@
+import pytest
+from unittest.mock import Mock
+from urllib.parse import urlparse
+import config
+
+pytestmark = pytest.mark.asyncio  # Apply to all tests in module
+
+# Initialize the configuration before running tests
+config.initialize()
+
+import app
+from storage import QueryCache
+
+
+@pytest.fixture
+def query_cache(monkeypatch):
+    """Fixture to give each test an empty query cache."""
+    cache = QueryCache()
+    monkeypatch.setattr(app, "query_cache", cache)
+    return cache
+
+
+@pytest.mark.parametrize("url", [
+    "https://example.com",
+    "https://Some.Example.COM/path/page",
+    "https://user:pw@Example.com:8080/path?q#f",
+    "https://user@example.com",
+    "http://example.com:8000",
+    "http://[::1]:8000/",
+    "http://[2001:DB8::1]/path",
+    "https://example.com?x=1",
+    "https://example.com#frag",
+    "https://example.com/?next=http://other.com",
+    "//example.com/path",
+    "example.com",
+    "example.com/path?u=http://other.com",
+])
+async def test_extract_domain_matches_urlparse(url):
+    assert app.extract_domain(url) == urlparse(url).hostname
+
+
+async def test_cache_search_result_stores_in_both_tiers(query_cache):
+    store = Mock()
+    generation = query_cache.generation("example.com")
+    result = {"query": "q", "response": "answer"}
+    await app._cache_search_result(store, "example.com", "q", generation,
+                                   result, embedding=[0.1, 0.2])
+
+    assert query_cache.get("example.com", "q") == result
+    store.cache_response.assert_called_once_with([0.1, 0.2], result, generation)
+
+
+async def test_cache_search_result_skips_stale_generation(query_cache):
+    store = Mock()
+    generation = query_cache.generation("example.com")
+    # The domain is re-scraped while the query is running
+    query_cache.invalidate("example.com")
+    await app._cache_search_result(store, "example.com", "q", generation,
+                                   {"query": "q", "response": "stale"},
+                                   embedding=[0.1, 0.2])
+
+    assert query_cache.get("example.com", "q") is None
+    store.cache_response.assert_not_called()
+
+
+class FakeQdrantClient:
+    """In-memory stand-in for the collection calls of the Qdrant client."""
+
+    def __init__(self):
+        self.collections = {}
+
+    def get_collection(self, collection_name):
+        if collection_name not in self.collections:
+            raise Exception(f"Collection {collection_name} doesn't exist")
+
+    def create_collection(self, collection_name, **kwargs):
+        self.collections[collection_name] = []
+
+    def delete_collection(self, collection_name):
+        self.collections.pop(collection_name, None)
+
+    def upsert(self, collection_name, points, wait=True):
+        self.get_collection(collection_name)
+        self.collections[collection_name].extend(points.payloads)
+
+
+async def test_semantic_cache_works_after_a_scrape(query_cache, monkeypatch):
+    from unittest.mock import AsyncMock, patch
+    from storage import DocumentStore
+
+    client = FakeQdrantClient()
+    with patch('storage.document_store.get_embeddings', return_value=Mock()):
+        store = DocumentStore("example.com", client=client)
+        scraper = Mock(stop_triggered=False, scrape_website=AsyncMock(),
+                       document_store=DocumentStore("example.com", client=client))
+    monkeypatch.setitem(app.stores, "example.com", store)
+    monkeypatch.setattr(app, "scrape_executor", None)
+
+    store.cache_response([0.1, 0.2], {"response": "before"}, generation=0)
+    await app._run_scrape(scraper, "example.com")
+    store.cache_response([0.1, 0.2], {"response": "after"}, generation=1)
+
+    cached = client.collections["query_cache_example.com"]
+    assert [payload["response"] for payload in cached] == [{"response": "after"}]
+
+
+@pytest.fixture
+def search_client(monkeypatch, query_cache):
+    """Fixture to call /search with a mocked store and the LLM enabled."""
+    from unittest.mock import AsyncMock
+    from fastapi.testclient import TestClient
+
+    batcher = Mock()
+    batcher.submit = AsyncMock(return_value=([0.1, 0.2], [{"text": "context"}]))
+    batcher.store.find_cached_response = Mock(return_value=None)
+    monkeypatch.setattr(app, "get_batcher", AsyncMock(return_value=batcher))
+    monkeypatch.setattr(app.config, "is_llm_disabled", lambda: False)
+    return TestClient(app.app)
+
+
+class FakeLLM:
+    """Chat model streaming the given chunks, then raising the given error."""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+
+    async def astream(self, prompt):
+        for chunk in self.chunks:
+            yield Mock(content=chunk)
+        if self.error:
+            raise self.error
+
+
+@pytest.mark.parametrize("llm", [FakeLLM([]), FakeLLM([], ConnectionError("down"))])
+async def test_search_returns_500_without_llm_answer(search_client, monkeypatch, llm):
+    monkeypatch.setattr(app, "llm", llm)
+    response = search_client.post("/search", json={"domain": "https://example.com", "query": "q"})
+
+    assert response.status_code == 500
+    assert response.json()["error"] == "Failed to get response from LLM"
+
+
+async def test_search_streams_llm_answer(search_client, monkeypatch):
+    monkeypatch.setattr(app, "llm", FakeLLM(["an ", "answer"]))
+    response = search_client.post("/search", json={"domain": "https://example.com", "query": "q"})
+
+    assert response.status_code == 200
+    assert response.text == "an answer"
+
+
+async def test_search_returns_500_when_search_fails(search_client, monkeypatch, query_cache):
+    batcher = await app.get_batcher("example.com")
+    batcher.submit.side_effect = RuntimeError("offline")
+    response = search_client.post("/search", json={"domain": "https://example.com", "query": "q"})
+
+    assert response.status_code == 500
+    assert response.json()["error"] == "Failed to search the knowledge base"
+    assert query_cache.get("example.com", "q") is None
+
+
+async def test_start_and_stop_scrape(monkeypatch):
+    from unittest.mock import AsyncMock, patch
+    import httpx
+    from fastapi.testclient import TestClient
+
+    # Keep the lifespan from loading the model and closing the shared client
+    monkeypatch.setattr(app, "get_embeddings", Mock())
+    monkeypatch.setattr(app, "_probe_client", httpx.AsyncClient())
+    monkeypatch.setattr(app, "_run_scrape", AsyncMock())
+    request = {"url": "https://example.com/docs", "schedule_interval_hours": 1}
+
+    with patch("scrapers.WebsiteScraper", side_effect=lambda *args, **kwargs: Mock(job=None)), \
+      TestClient(app.app) as client:
+        assert client.post("/scrape/start", json=request).status_code == 200
+        assert "example.com" in app.scrapers
+        assert app.scheduler.get_job("scraper_example.com") is not None
+
+        response = client.post("/scrape/start", json=request)
+        assert response.status_code == 400
+        assert response.json()["error"] == "Scraper for domain example.com already exists"
+
+        assert client.put("/scrape/stop", json=request).status_code == 200
+        assert "example.com" not in app.scrapers
+        assert app.scheduler.get_job("scraper_example.com") is None
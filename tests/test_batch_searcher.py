@@ -0,0 +1,33 @@
+import asyncio
+import pytest
+from unittest.mock import Mock
+from storage.batch_searcher import BatchSearcher
+
+pytestmark = pytest.mark.asyncio  # Apply to all tests in module
+
+
+@pytest.mark.asyncio
+async def test_submit_coalesces_concurrent_queries():
+    store = Mock()
+    store.search_documents_batch = Mock(side_effect=lambda queries, top_k: (
+        [[float(i)] for i in range(len(queries))],
+        [[{"text": query}] for query in queries]
+    ))
+    batcher = BatchSearcher(store, max_batch_size=8, max_wait_seconds=0.05)
+
+    results = await asyncio.gather(*(batcher.submit(f"q{i}") for i in range(3)))
+    await batcher.close()
+
+    store.search_documents_batch.assert_called_once_with(["q0", "q1", "q2"], 5)
+    assert results[1] == ([1.0], [{"text": "q1"}])
+
+
+@pytest.mark.asyncio
+async def test_submit_propagates_errors():
+    store = Mock()
+    store.search_documents_batch = Mock(side_effect=RuntimeError("offline"))
+    batcher = BatchSearcher(store)
+
+    with pytest.raises(RuntimeError):
+        await batcher.submit("q0")
+    await batcher.close()
@@ -1,3 +1,5 @@
+import logging
+import pytest
 from tests import update_config, get_config
 
 
@@ -54,3 +56,87 @@ def test_update_config_new_key():
     assert updated_config()["new_key"] == "new_value"
     # Reset config to original state
     update_config(original_config())
+
+
+def test_get_config_is_read_only():
+    """Test config returned to callers cannot be mutated directly"""
+    config = get_config()()
+
+    with pytest.raises(TypeError):
+        config["collection_name"] = "test_collection"
+
+
+def test_update_config_refreshes_llm_disabled():
+    """Test cached derived values follow config updates"""
+    from config.config import is_llm_disabled, LLM_CONFIGURATION
+    original = get_config()().get(LLM_CONFIGURATION)
+
+    update_config({LLM_CONFIGURATION: {"disable": True}})
+    assert is_llm_disabled() is True
+
+    update_config({LLM_CONFIGURATION: {"disable": False}})
+    assert is_llm_disabled() is False
+    # Reset config to original state
+    update_config({LLM_CONFIGURATION: original})
+
+
+def test_get_log_level_returns_int(monkeypatch):
+    """Test every supported logging level resolves to a logging constant"""
+    from config.config import get_log_level
+    for name in ["DEBUG", "INFO", "WARNING", "ERROR"]:
+        monkeypatch.setenv("LOGGING_LEVEL", name)
+        assert get_log_level() == getattr(logging, name)
+
+
+def test_get_scraper_useragent_from_config():
+    """Test the configured user agent is used for scraping"""
+    from config.config import get_scraper_useragent, SCRAPE_CONFIGURATION
+    original = get_config()().get(SCRAPE_CONFIGURATION)
+
+    update_config({SCRAPE_CONFIGURATION: {"user_agent": "TestBot/1.0"}})
+    assert get_scraper_useragent() == "TestBot/1.0"
+    # Reset config to original state
+    update_config({SCRAPE_CONFIGURATION: original})
+
+
+def test_update_config_refreshes_typed_config():
+    """Test typed sub-configurations are rebuilt and values converted"""
+    from config import config as config_module
+    original = get_config()().get(config_module.VECTOR_DB_CONFIGURATION)
+
+    update_config({config_module.VECTOR_DB_CONFIGURATION: {
+        "host": "qdrant.local", "top_k": "7", "unknown": "ignored"
+    }})
+    assert config_module.vector_db.host == "qdrant.local"
+    assert config_module.vector_db.top_k == 7
+    assert config_module.vector_db.port == 6333
+    # Reset config to original state
+    update_config({config_module.VECTOR_DB_CONFIGURATION: original})
+
+
+def test_load_json_env_defaults(monkeypatch):
+    """Test missing environment variables fall back to the defaults"""
+    from config.config import _load_json_env
+    monkeypatch.delenv("TEST_JSON_CONFIGURATION", raising=False)
+    assert _load_json_env("TEST_JSON_CONFIGURATION", {"a": 1}) == {"a": 1}
+
+    monkeypatch.setenv("TEST_JSON_CONFIGURATION", '{"b": 2}')
+    assert _load_json_env("TEST_JSON_CONFIGURATION", {"a": 1}) == {"a": 1, "b": 2}
+
+
+def test_from_dict_parses_bool_strings():
+    """Test boolean settings given as strings are parsed, not truthy"""
+    from config.config import _from_dict, LLMConfig
+    assert _from_dict(LLMConfig, {"disable": "false"}).disable is False
+    assert _from_dict(LLMConfig, {"disable": "True"}).disable is True
+    assert _from_dict(LLMConfig, {"disable": 0}).disable is False
+    with pytest.raises(ValueError):
+        _from_dict(LLMConfig, {"disable": "maybe"})
+
+
+def test_from_dict_keeps_float_values():
+    """Test float settings keep their fraction and parse from strings"""
+    from config.config import _from_dict, ScrapeConfig
+    assert _from_dict(ScrapeConfig, {"crawl_delay": 0.5}).crawl_delay == 0.5
+    assert _from_dict(ScrapeConfig, {"crawl_delay": "1.5"}).crawl_delay == 1.5
+    assert _from_dict(ScrapeConfig, {"crawl_delay": 3}).crawl_delay == 3.0
@@ -0,0 +1,205 @@
+import dataclasses
+import uuid
+import pytest
+from unittest.mock import Mock, patch
+import config
+
+# Initialize the configuration before running tests
+config.initialize()
+
+from storage.document_store import DocumentStore, point_id
+
+
+@pytest.fixture
+def document_store():
+    """Fixture to create a DocumentStore with mocked model and client."""
+    embeddings = Mock()
+    embeddings.embed_documents = Mock(
+        side_effect=lambda texts: [[0.1, 0.2] for _ in texts])
+    client = Mock()
+    client.scroll.return_value = ([], None)
+    with patch('storage.document_store.get_embeddings', return_value=embeddings):
+        store = DocumentStore("test_collection", client=client)
+    return store
+
+
+def test_store_documents_batches_chunks(document_store):
+    document = {
+        "url": "https://example.com",
+        "title": "Test Title",
+        "content": "word " * 500,
+        "content_hash": "hash"
+    }
+    document_store.store_documents([document])
+
+    document_store.embeddings.embed_documents.assert_called_once()
+    texts = document_store.embeddings.embed_documents.call_args[0][0]
+    assert len(texts) > 1
+    document_store.client.upsert.assert_called_once()
+    points = document_store.client.upsert.call_args.kwargs["points"]
+    assert len(points.ids) == len(texts)
+    assert points.payloads[0]["metadata"]["url"] == "https://example.com"
+
+
+def test_store_documents_skips_unchanged_documents(document_store):
+    stored = Mock(payload={"metadata": {"content_hash": "stored"}})
+    document_store.client.scroll.return_value = ([stored], None)
+    documents = [{
+        "url": "https://example.com/" + content_hash,
+        "title": "Test",
+        "content": "content " + content_hash,
+        "content_hash": content_hash
+    } for content_hash in ("stored", "new")]
+    document_store.store_documents(documents)
+    document_store.store_documents(documents)
+
+    document_store.client.scroll.assert_called_once()
+    document_store.embeddings.embed_documents.assert_called_once_with(["content new"])
+    document_store.client.upsert.assert_called_once()
+
+
+def test_store_documents_skips_empty_content(document_store):
+    document_store.store_documents([{
+        "url": "https://example.com",
+        "title": "Empty",
+        "content": ""
+    }])
+
+    document_store.client.upsert.assert_not_called()
+
+
+def test_new_collection_uses_int8_quantization():
+    client = Mock()
+    client.get_collection.side_effect = Exception("not found")
+    with patch('storage.document_store.get_embeddings', return_value=Mock()):
+        store = DocumentStore("test_collection", client=client)
+
+    quantization = client.create_collection.call_args.kwargs["quantization_config"]
+    assert quantization.scalar.type == "int8"
+    assert store.search_params.quantization.rescore is True
+
+
+def test_store_documents_embeds_all_documents_at_once(document_store):
+    documents = [{
+        "url": f"https://example.com/{i}",
+        "title": f"Page {i}",
+        "content": f"content of page {i}"
+    } for i in range(3)]
+    document_store.store_documents(documents)
+
+    document_store.embeddings.embed_documents.assert_called_once()
+    assert len(document_store.embeddings.embed_documents.call_args[0][0]) == 3
+    document_store.client.upsert.assert_called_once()
+
+
+def test_point_id_is_stable_uuid():
+    assert point_id("some text") == point_id("some text")
+    assert point_id("some text") != point_id("other text")
+    assert str(uuid.UUID(point_id("some text"))) == point_id("some text")
+
+
+@pytest.mark.asyncio
+async def test_astore_documents_stores_on_worker_thread(document_store):
+    document_store.store_documents = Mock()
+    documents = [{"url": "https://example.com", "title": "Test", "content": "text"}]
+    await document_store.astore_documents(documents)
+
+    document_store.store_documents.assert_called_once_with(documents)
+
+
+@pytest.mark.parametrize("cuda_available, half_precision", [(False, False), (True, True)])
+def test_get_embeddings_uses_half_precision_on_gpu(cuda_available, half_precision):
+    from storage import document_store
+
+    document_store.get_embeddings.cache_clear()
+    try:
+        with patch('storage.document_store.HuggingFaceEmbeddings') as embeddings, \
+          patch('torch.cuda.is_available', return_value=cuda_available):
+            document_store.get_embeddings()
+            device = embeddings.call_args.kwargs["model_kwargs"]["device"]
+            assert device == ("cuda" if cuda_available else "cpu")
+            assert embeddings.return_value._client.half.called is half_precision
+    finally:
+        document_store.get_embeddings.cache_clear()
+
+
+def test_search_documents_reads_only_result_payload(document_store):
+    document_store.client.search.return_value = []
+    document_store.search_documents("query", embedding=[0.1, 0.2], hnsw_ef=32)
+
+    kwargs = document_store.client.search.call_args.kwargs
+    assert kwargs["with_vectors"] is False
+    assert kwargs["with_payload"].include == ["text", "metadata"]
+    assert kwargs["search_params"].hnsw_ef == 32
+
+
+def test_search_documents_batch_raises_on_qdrant_errors(document_store):
+    document_store.embeddings.embed_documents.return_value = [[0.1, 0.2]]
+    document_store.client.search_batch.side_effect = RuntimeError("offline")
+
+    with pytest.raises(RuntimeError):
+        document_store.search_documents_batch(["query"])
+
+
+def test_document_stores_share_model_and_splitter(document_store):
+    with patch('storage.document_store.get_embeddings', return_value=document_store.embeddings):
+        other = DocumentStore("other_collection", client=document_store.client)
+
+    assert other.embeddings is document_store.embeddings
+    assert other.text_splitter is document_store.text_splitter
+
+
+def test_store_documents_embeds_and_stores_in_windows(document_store):
+    document_store.vector_config = dataclasses.replace(
+        document_store.vector_config, upsert_batch_size=2)
+    documents = [{
+        "url": f"https://example.com/{i}",
+        "title": f"Page {i}",
+        "content": f"content of page {i}"
+    } for i in range(3)]
+    document_store.store_documents(documents)
+
+    windows = [call.args[0] for call in document_store.embeddings.embed_documents.call_args_list]
+    assert [len(window) for window in windows] == [2, 1]
+    assert document_store.client.upsert.call_count == 2
+
+
+def test_find_cached_response_filters_on_generation_and_age(document_store):
+    cached = Mock(payload={"response": {"response": "cached answer"}})
+    document_store.client.search.return_value = [cached]
+
+    with patch('storage.document_store.time.time', return_value=1000.0):
+        result = document_store.find_cached_response(
+            [0.1, 0.2], generation=3, similarity_threshold=0.95, ttl_seconds=600)
+
+    assert result == {"response": "cached answer"}
+    kwargs = document_store.client.search.call_args.kwargs
+    assert kwargs["collection_name"] == "query_cache_test_collection"
+    assert kwargs["score_threshold"] == 0.95
+    generation, cached_at = kwargs["query_filter"].must
+    assert generation.key == "generation" and generation.match.value == 3
+    assert cached_at.key == "cached_at" and cached_at.range.gte == 400.0
+
+
+def test_find_cached_response_miss(document_store):
+    document_store.client.search.return_value = []
+    assert document_store.find_cached_response([0.1, 0.2], generation=0) is None
+
+    document_store.client.search.side_effect = Exception("collection not found")
+    assert document_store.find_cached_response([0.1, 0.2], generation=0) is None
+
+
+def test_cache_response_creates_collection_once(document_store):
+    document_store.client.get_collection.reset_mock()
+    document_store.cache_response([0.1, 0.2], {"response": "a"}, generation=1)
+    document_store.cache_response([0.3, 0.4], {"response": "b"}, generation=1)
+
+    document_store.client.get_collection.assert_called_once_with("query_cache_test_collection")
+    assert document_store.client.upsert.call_count == 2
+    payload = document_store.client.upsert.call_args.kwargs["points"].payloads[0]
+    assert payload["response"] == {"response": "b"} and payload["generation"] == 1
+
+    # Clearing drops the collection, the next write has to create it again
+    document_store.clear_cached_responses()
+    document_store.cache_response([0.1, 0.2], {"response": "a"}, generation=2)
+    assert document_store.client.get_collection.call_count == 2
@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from scrapers.page_pool import PagePool
+
+pytestmark = pytest.mark.asyncio  # Apply to all tests in module
+
+
+def make_context():
+    """Create a mock browser context handing out mock pages."""
+    context = Mock()
+
+    async def new_page():
+        page = Mock()
+        page.is_closed.return_value = False
+        page.goto = AsyncMock()
+        page.close = AsyncMock()
+        return page
+
+    context.new_page = AsyncMock(side_effect=new_page)
+    return context
+
+
+async def test_pages_are_reused():
+    context = make_context()
+    pool = PagePool(context, size=1, max_uses=10)
+    await pool.start()
+
+    async with pool.page() as first:
+        pass
+    async with pool.page() as second:
+        pass
+
+    assert first is second
+    assert context.new_page.call_count == 1
+    first.goto.assert_called_with("about:blank")
+
+
+async def test_pages_are_replaced_after_max_uses():
+    context = make_context()
+    pool = PagePool(context, size=1, max_uses=2)
+    await pool.start()
+
+    async with pool.page() as first:
+        pass
+    async with pool.page():
+        pass
+    async with pool.page() as third:
+        pass
+
+    assert third is not first
+    first.close.assert_called_once()
+    assert context.new_page.call_count == 2
+
+
+async def test_broken_pages_are_dropped_and_reopened():
+    context = make_context()
+    pool = PagePool(context, size=1)
+    await pool.start()
+
+    async with pool.page() as first:
+        first.goto.side_effect = Exception("Target closed")
+    async with pool.page() as second:
+        pass
+
+    assert second is not first
+    assert context.new_page.call_count == 2
+
+
+async def test_context_is_rotated_after_rotate_every_pages():
+    context = make_context()
+    context.storage_state = AsyncMock(return_value={"cookies": []})
+    context.close = AsyncMock()
+    new_context = make_context()
+    factory = AsyncMock(return_value=new_context)
+    pool = PagePool(context, size=2, context_factory=factory, rotate_every=2)
+    await pool.start()
+
+    async with pool.page():
+        async with pool.page():
+            pass
+        # Rotation waits for the page still checked out
+        factory.assert_not_called()
+
+    factory.assert_called_once_with({"cookies": []})
+    context.close.assert_called_once()
+    assert pool.context is new_context
+    async with pool.page():
+        pass
+    assert new_context.new_page.call_count == 2
+
+
+async def test_context_is_rotated_when_last_page_raises():
+    context = make_context()
+    context.storage_state = AsyncMock(return_value={})
+    context.close = AsyncMock()
+    factory = AsyncMock(return_value=make_context())
+    pool = PagePool(context, size=2, context_factory=factory, rotate_every=1)
+    await pool.start()
+
+    with pytest.raises(RuntimeError):
+        async with pool.page():
+            async with pool.page():
+                pass
+            raise RuntimeError("Timeout")
+
+    factory.assert_called_once()
+    async with asyncio.timeout(1):
+        async with pool.page():
+            pass
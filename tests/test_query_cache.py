@@ -0,0 +1,45 @@
+from storage.query_cache import QueryCache
+
+
+def test_query_cache_hit_and_miss():
+    """Test cached responses are returned for the same domain and query"""
+    cache = QueryCache(max_size=10, ttl_seconds=60)
+    cache.put("example.com", "what is rag", {"results": []})
+
+    assert cache.get("example.com", "what is rag") == {"results": []}
+    assert cache.get("example.com", "other query") is None
+    assert cache.get("other.com", "what is rag") is None
+
+
+def test_query_cache_evicts_least_recently_used():
+    """Test the oldest entry is evicted once the cache is full"""
+    cache = QueryCache(max_size=2, ttl_seconds=60)
+    cache.put("example.com", "q1", 1)
+    cache.put("example.com", "q2", 2)
+    # Touch q1 so q2 becomes the least recently used entry
+    cache.get("example.com", "q1")
+    cache.put("example.com", "q3", 3)
+
+    assert cache.get("example.com", "q1") == 1
+    assert cache.get("example.com", "q2") is None
+    assert cache.get("example.com", "q3") == 3
+
+
+def test_query_cache_expires_entries():
+    """Test entries are not returned after the TTL"""
+    cache = QueryCache(max_size=10, ttl_seconds=-1)
+    cache.put("example.com", "q1", 1)
+
+    assert cache.get("example.com", "q1") is None
+
+
+def test_query_cache_invalidate_domain():
+    """Test invalidating a domain drops its entries only"""
+    cache = QueryCache(max_size=10, ttl_seconds=60)
+    cache.put("example.com", "q1", 1)
+    cache.put("other.com", "q1", 2)
+
+    assert cache.invalidate("example.com") == 1
+    assert cache.generation("example.com") == 1
+    assert cache.get("example.com", "q1") is None
+    assert cache.get("other.com", "q1") == 2
@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
 from playwright.async_api import Page
@@ -13,18 +14,26 @@ from tests import get_scraper
 WebsiteScraper = get_scraper()
 
 
+@pytest.fixture(autouse=True)
+def clear_robots_cache():
+    """Fixture to start every test without cached robots.txt files."""
+    from scrapers import website_scraper
+    website_scraper._ROBOTS_CACHE.clear()
+    yield
+    website_scraper._ROBOTS_CACHE.clear()
+
+
 @pytest.fixture
 def mock_page():
     """Fixture to create a mock page object."""
     mock_page = AsyncMock(spec=Page)
-    mock_page.title.return_value = "Test Title"
     mock_page.url = "https://example.com"
-    mock_page.query_selector = AsyncMock()
-
-    # Setup the mock element
-    mock_element = AsyncMock()
-    mock_element.inner_text = AsyncMock(return_value="Test content")
-    mock_page.query_selector.return_value = mock_element
+    mock_page.evaluate.return_value = {
+        "title": "Test Title",
+        "text": "Test content",
+        "links": ["https://example.com/page", "/about", "https://other.com",
+                  "#top", "/about#team", "//cdn.example.net/lib.js"]
+    }
     return mock_page
 
 
@@ -52,7 +61,7 @@ async def test_init():
         scraper = WebsiteScraper("https://example.com")
         assert scraper.base_url == "https://example.com"
         assert scraper.visited_urls == set()
-        assert scraper.urls_to_scrape == []
+        assert scraper.urls_to_scrape.qsize() == 0
         doc_store.assert_called_once()
 
 
@@ -63,10 +72,34 @@ async def test_can_fetch():
         doc_store.return_value = mock_document_store
         mock_parser.return_value.can_fetch.return_value = True
         scraper = WebsiteScraper("https://example.com")
+        await scraper._ensure_robots()
         assert scraper._can_fetch("https://example.com/page") is True
         doc_store.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_robots_parser_is_cached_per_host():
+    with patch('scrapers.website_scraper.RobotFileParser') as mock_parser, \
+      patch('scrapers.website_scraper.DocumentStore') as doc_store:
+        doc_store.return_value = mock_document_store
+        first = WebsiteScraper("https://example.com/docs")
+        second = WebsiteScraper("https://example.com/blog")
+        assert await first._ensure_robots() is await second._ensure_robots()
+        mock_parser.return_value.read.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_robots_fetches_are_coalesced():
+    with patch('scrapers.website_scraper.RobotFileParser') as mock_parser, \
+      patch('scrapers.website_scraper.DocumentStore') as doc_store:
+        doc_store.return_value = mock_document_store
+        scraper = WebsiteScraper("https://example.com")
+        mock_parser.return_value.read.assert_not_called()
+        parsers = await asyncio.gather(*[scraper._ensure_robots() for _ in range(3)])
+        assert all(parser is parsers[0] for parser in parsers)
+        mock_parser.return_value.read.assert_called_once()
+
+
 @pytest.mark.asyncio
 async def test_generate_content_hash():
     with patch('scrapers.website_scraper.DocumentStore') as doc_store:
@@ -80,32 +113,71 @@ async def test_generate_content_hash():
         doc_store.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_content_hash_of_large_content_matches_sha256():
+    import hashlib
+
+    with patch('scrapers.website_scraper.DocumentStore'):
+        scraper = WebsiteScraper("https://example.com")
+        content = "größe 😀 " * 50000
+        expected = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        assert scraper._generate_content_hash(content) == expected
+        assert scraper._generate_content_hash("") == hashlib.sha256(b"").hexdigest()
+
+
 @pytest.mark.asyncio
 async def test_extract_content(mock_page, mock_response):
     with patch('scrapers.website_scraper.DocumentStore') as doc_store:
         doc_store.return_value = mock_document_store
         scraper = WebsiteScraper("https://example.com")
-        content = await scraper._extract_content(mock_response, mock_page)
+        content, _ = await scraper._extract_page(mock_response, mock_page)
 
         assert content["title"] == "Test Title"
         assert content["url"] == "https://example.com"
         assert content["content"] == "Test content"
         assert "content_hash" in content
         assert content["last_modified"] == "test-date"
+        assert isinstance(content["metadata"]["scraped_at"], int)
+        mock_page.evaluate.assert_called_once_with(
+            scraper._EXTRACT_SCRIPT, [scraper._MAIN_SELECTOR, scraper._NOISE_SELECTOR])
         doc_store.assert_called_once()
 
 
 @pytest.mark.asyncio
-async def test_extract_links(mock_page):
+async def test_extract_links(mock_page, mock_response):
     with patch('scrapers.website_scraper.DocumentStore') as doc_store:
         doc_store.return_value = mock_document_store
         scraper = WebsiteScraper("https://example.com")
-        mock_element = AsyncMock()
-        mock_element.get_attribute.return_value = "https://example.com/page"
-        mock_page.query_selector_all.return_value = [mock_element]
-        links = await scraper._extract_links(mock_page)
+        _, links = await scraper._extract_page(mock_response, mock_page)
 
-        assert links == ["https://example.com/page"]
+        assert links == ["https://example.com/page", "https://example.com/about",
+                         "https://example.com/about"]
+        doc_store.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_normalize_link():
+    with patch('scrapers.website_scraper.DocumentStore'):
+        scraper = WebsiteScraper("https://example.com")
+        assert scraper._normalize_link("/page#section") == "/page"
+        assert scraper._normalize_link("/page?utm_source=x&id=1&gclid=y") == "/page?id=1"
+        assert scraper._normalize_link("/page?utm_source=x") == "/page"
+        assert scraper._normalize_link("/page?id=1") == "/page?id=1"
+        assert scraper._normalize_link("#top") == ""
+
+
+@pytest.mark.asyncio
+async def test_enqueue_skips_known_urls():
+    with patch('scrapers.website_scraper.DocumentStore') as doc_store:
+        doc_store.return_value = mock_document_store
+        scraper = WebsiteScraper("https://example.com")
+        scraper.visited_urls.add("https://example.com/page1")
+        scraper._enqueue("https://example.com/page1")
+        scraper._enqueue("https://example.com/page2")
+        scraper._enqueue("https://example.com/page2")
+
+        assert scraper.urls_to_scrape.qsize() == 1
+        assert scraper.urls_to_scrape.get_nowait() == "https://example.com/page2"
         doc_store.assert_called_once()
 
 
@@ -115,7 +187,7 @@ async def test_progress():
         doc_store.return_value = mock_document_store
         scraper = WebsiteScraper("https://example.com")
         scraper.visited_urls.add("https://example.com/page1")
-        scraper.urls_to_scrape.append("https://example.com/page2")
+        scraper._enqueue("https://example.com/page2")
 
         progress = scraper.progress()
         assert progress["visited_urls"] == 1
@@ -131,10 +203,165 @@ async def test_stop():
         mock_store.close = Mock(return_value=None)
         scraper = WebsiteScraper("https://example.com")
         scraper.visited_urls.add("https://example.com/page")
-        scraper.urls_to_scrape.append("https://example.com/page2")
+        scraper._enqueue("https://example.com/page2")
         scraper.stop()
 
         assert len(scraper.visited_urls) == 0
-        assert len(scraper.urls_to_scrape) == 0
+        assert scraper.urls_to_scrape.qsize() == 0
         doc_store.assert_called_once()
         mock_store.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_stop_while_running_closes_store_when_run_ends():
+    with patch('scrapers.website_scraper.DocumentStore'):
+        scraper = WebsiteScraper("https://example.com", override_robots=True)
+        store = scraper.document_store
+        crawling = asyncio.Event()
+        release = asyncio.Event()
+
+        async def crawl(max_pages):
+            crawling.set()
+            await release.wait()
+
+        scraper._crawl = crawl
+        run = asyncio.create_task(scraper.scrape_website())
+        await crawling.wait()
+        scraper.stop()
+        store.close.assert_not_called()
+
+        release.set()
+        await run
+        store.close.assert_called_once()
+
+        # A stopped scraper does not start another run
+        scraper._crawl = AsyncMock()
+        await scraper.scrape_website()
+        scraper._crawl.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_scrape_worker_stops_when_scraper_stopped():
+    with patch('scrapers.website_scraper.DocumentStore'):
+        scraper = WebsiteScraper("https://example.com", override_robots=True)
+        scraper._scrape_page = AsyncMock()
+        scraper._enqueue("https://example.com/page")
+        scraper.stop_triggered = True
+        done = asyncio.Event()
+        await asyncio.wait_for(scraper._scrape_worker(
+            Mock(), scraper.urls_to_scrape, done, 3, 0), timeout=1)
+
+        assert done.is_set()
+        scraper._scrape_page.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_scrape_website_stores_every_visited_page_at_max_pages():
+    class FakePage:
+        url = None
+
+        def is_closed(self):
+            return False
+
+        async def goto(self, url, **kwargs):
+            if url != "about:blank":
+                self.url = url
+            await asyncio.sleep(0.01)
+            return Mock(headers={})
+
+        async def wait_for_load_state(self, *args, **kwargs):
+            pass
+
+        async def evaluate(self, *args):
+            # Every page links to three new pages
+            n = int(self.url.rsplit("/", 1)[-1] or 0) if self.url[-1].isdigit() else 0
+            return {"title": "Page", "text": self.url,
+                    "links": [f"/{n * 3 + i}" for i in (1, 2, 3)]}
+
+        async def close(self):
+            pass
+
+    context = AsyncMock()
+    context.new_page.side_effect = lambda: FakePage()
+    browser = AsyncMock()
+    browser.new_context.return_value = context
+    playwright = AsyncMock()
+    playwright.__aenter__.return_value.chromium.launch.return_value = browser
+
+    with patch('scrapers.website_scraper.DocumentStore'), \
+      patch('scrapers.website_scraper.async_playwright', return_value=playwright), \
+      patch('scrapers.website_scraper.MAX_CONCURRENT_PAGES', 10), \
+      patch('scrapers.website_scraper.DEFAULT_CRAWL_DELAY', 0):
+        scraper = WebsiteScraper("https://example.com", override_robots=True)
+        scraper._setup_robots_parser = Mock(return_value=Mock(crawl_delay=Mock(return_value=0)))
+        scraper.document_store.astore_documents = AsyncMock()
+        await asyncio.wait_for(scraper.scrape_website(max_pages=50), timeout=5)
+
+        stored = [doc["url"] for call in scraper.document_store.astore_documents.call_args_list
+                  for doc in call.args[0]]
+        assert len(scraper.visited_urls) == 50
+        assert sorted(stored) == sorted(scraper.visited_urls)
+
+
+@pytest.mark.asyncio
+async def test_scrape_page_continues_when_network_never_idles(mock_page, mock_response):
+    from contextlib import asynccontextmanager
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+    with patch('scrapers.website_scraper.DocumentStore'):
+        scraper = WebsiteScraper("https://example.com", override_robots=True)
+        mock_page.goto.return_value = mock_response
+        mock_page.wait_for_load_state.side_effect = PlaywrightTimeoutError("Timeout")
+        scraper.document_store.astore_documents = AsyncMock()
+
+        pages = Mock()
+
+        @asynccontextmanager
+        async def page():
+            yield mock_page
+
+        pages.page = page
+        await scraper._scrape_page(pages, "https://example.com", 10, 0)
+        await scraper._flush_documents()
+
+        assert mock_page.goto.call_args.kwargs["wait_until"] == "domcontentloaded"
+        assert "https://example.com" in scraper.visited_urls
+        scraper.document_store.astore_documents.assert_called_once()
+        assert scraper.urls_to_scrape.qsize() == 2
+
+
+@pytest.mark.asyncio
+async def test_route_request_blocks_non_text_resources():
+    with patch('scrapers.website_scraper.DocumentStore'):
+        scraper = WebsiteScraper("https://example.com")
+        for resource_type, blocked in [("image", True), ("stylesheet", True),
+                                       ("document", False), ("script", False)]:
+            route = AsyncMock()
+            route.request = Mock(resource_type=resource_type)
+            await scraper._route_request(route)
+            assert route.abort.called is blocked
+            assert route.continue_.called is not blocked
+
+
+@pytest.mark.asyncio
+async def test_concurrent_scrapes_load_a_url_once(mock_page, mock_response):
+    from contextlib import asynccontextmanager
+
+    with patch('scrapers.website_scraper.DocumentStore'):
+        scraper = WebsiteScraper("https://example.com", override_robots=True)
+        mock_page.goto.return_value = mock_response
+
+        pages = Mock()
+
+        @asynccontextmanager
+        async def page():
+            await asyncio.sleep(0)
+            yield mock_page
+
+        pages.page = page
+        await asyncio.gather(*[
+            scraper._scrape_page(pages, "https://example.com/page", 10, 0)
+            for _ in range(3)
+        ])
+
+        mock_page.goto.assert_called_once()